@@ -4,21 +4,25 @@ This file defines the root directories for datasets and logs.
 """
 
 import os
+from pathlib import Path
 
-CURRENT_DIR = os.path.dirname(os.path.realpath(__file__))
+ROOT = Path(__file__).resolve().parent
+CURRENT_DIR = str(ROOT)
 
 # Define dataset and logging directories at project root level
-DATASET_DIR = os.path.join(CURRENT_DIR, 'datasets')
-LOGGING_DIR = os.path.join(CURRENT_DIR, 'logs')
+DATASET_DIR = str(ROOT / 'datasets')
+LOGGING_DIR = str(ROOT / 'logs')
 
-# Create directories if they don't exist
-if not os.path.exists(DATASET_DIR):
-    os.makedirs(DATASET_DIR, exist_ok=True)
-    print(f"Created DATASET_DIR: {DATASET_DIR}")
-
-if not os.path.exists(LOGGING_DIR):
-    os.makedirs(LOGGING_DIR, exist_ok=True)
-    print(f"Created LOGGING_DIR: {LOGGING_DIR}")
+# Create directories if they don't exist: one mkdir each, no exists() pre-check.
+# This runs on every import, so only report new directories when asked to.
+for _name, _dir in (('DATASET_DIR', DATASET_DIR), ('LOGGING_DIR', LOGGING_DIR)):
+    try:
+        Path(_dir).mkdir(parents=True)
+    except FileExistsError:
+        continue
+    if os.environ.get('FINSIGHTS_VERBOSE'):
+        print(f"Created {_name}: {_dir}")
+del _name, _dir
 
 # Export all constants
 __all__ = ['CURRENT_DIR', 'DATASET_DIR', 'LOGGING_DIR']
\ No newline at end of file
@@ -27,6 +27,9 @@ if str(SRC_DIR) not in sys.path:
 
 LOG = logging.getLogger(__name__)
 
+# Max per-company extraction tasks running at once for this DAG
+EXTRACT_PARALLELISM = int(os.environ.get("SEC_EXTRACT_PARALLELISM", "4"))
+
 
 # ============================================================================
 # Task Callables 
@@ -68,9 +71,34 @@ def task_download_sec_filings():
     """Download filings from SEC EDGAR"""
     _run_module("src.download_filings")
 
-def task_extract_and_convert():
-    """Extract items and convert to parquet"""
-    _run_module("src.extract_and_convert")
+def task_list_filing_ciks():
+    """List the CIKs with downloaded filings - one mapped extract task per CIK"""
+    import json
+    import pandas as pd
+
+    with open(AIRFLOW_HOME / "config" / "config.json") as fin:
+        config = json.load(fin)["extract_items"]
+
+    metadata_csv = AIRFLOW_HOME / "datasets" / config["filings_metadata_file"]
+    if not metadata_csv.exists():
+        LOG.info(f"No filings metadata at {metadata_csv}; nothing to extract.")
+        return []
+
+    df = pd.read_csv(metadata_csv, dtype=str)
+    if config["filing_types"]:
+        df = df[df["Type"].isin(config["filing_types"])]
+
+    ciks = sorted(df["CIK"].dropna().unique())
+    LOG.info(f"{len(ciks)} companies to extract: {ciks}")
+    return [[cik] for cik in ciks]
+
+def task_extract_and_convert_company(cik: str):
+    """Extract items and convert to parquet for one company"""
+    _run_module("src.extract_and_convert", ["--cik", cik])
+
+def task_merge_extracted_parquet():
+    """Merge the per-company parquet files into the staging file"""
+    _run_module("src.extract_and_convert", ["--merge-only"])
 
 # def task_validate_data():
 #     """Validate extracted data using Great Expectations"""
@@ -199,7 +227,7 @@ default_args = {
 
 with DAG(
     dag_id="sec_filings_etl_pipeline",
-    description="Daily ETL: Download → Extract → Convert → Merge",
+    description="Daily ETL: Download → Extract/Convert (per company) → Merge",
     default_args=default_args,
     start_date=datetime(2025, 1, 1),
     catchup=False,
@@ -222,9 +250,25 @@ with DAG(
         python_callable=task_download_sec_filings,
     )
 
-    extract_convert_merge = PythonOperator(
-        task_id="extract_convert_merge",
-        python_callable=task_extract_and_convert,
+    list_filing_ciks = PythonOperator(
+        task_id="list_filing_ciks",
+        python_callable=task_list_filing_ciks,
+    )
+
+    # One task per company, run in parallel; a short timeout keeps a single
+    # hung filing from holding up the run
+    extract_convert = PythonOperator.partial(
+        task_id="extract_convert_company",
+        python_callable=task_extract_and_convert_company,
+        max_active_tis_per_dag=EXTRACT_PARALLELISM,
+        execution_timeout=timedelta(minutes=10),
+    ).expand(op_args=list_filing_ciks.output)
+
+    # Runs even when there were no companies (mapped tasks skipped)
+    merge_extracted = PythonOperator(
+        task_id="merge_extracted_parquet",
+        python_callable=task_merge_extracted_parquet,
+        trigger_rule=TriggerRule.NONE_FAILED,
     )
 
     # validate_data = PythonOperator(
@@ -270,5 +314,5 @@ with DAG(
 
     # Task dependencies
     
-    get_companies_list >> check_inputs >> download_filings >> extract_convert_merge  >> upload_processed_files >> cleanup >> merge_s3_data  >> success_notify
-    [get_companies_list, check_inputs, download_filings, extract_convert_merge, upload_processed_files, cleanup, merge_s3_data] >> failure_notify
\ No newline at end of file
+    get_companies_list >> check_inputs >> download_filings >> list_filing_ciks >> extract_convert >> merge_extracted >> upload_processed_files >> cleanup >> merge_s3_data  >> success_notify
+    [get_companies_list, check_inputs, download_filings, list_filing_ciks, extract_convert, merge_extracted, upload_processed_files, cleanup, merge_s3_data] >> failure_notify
\ No newline at end of file
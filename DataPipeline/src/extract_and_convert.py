@@ -861,11 +861,18 @@ class ExtractItems:
 # MAIN FUNCTION - COMBINES EXTRACTION AND CONVERSION
 # ============================================================================
 
-def main() -> None:
+def main(cik: Optional[str] = None, merge_only: bool = False) -> None:
     """
     Main function that:
     1. Extracts items from SEC filings and saves as JSON
     2. Converts JSON files to CSV/Parquet format
+    3. Merges all parquet files into one staging file
+
+    Args:
+        cik: Only extract/convert this company's filings and skip the merge,
+            so the DAG can run one shard per company in parallel
+        merge_only: Skip steps 1-2 and only merge the parquet files the
+            per-company shards already wrote
     """
     with open("./config/config.json") as fin:
         config = json.load(fin)["extract_items"]
@@ -882,7 +889,10 @@ def main() -> None:
     if config["filing_types"]:
         filings_metadata_df = filings_metadata_df[filings_metadata_df["Type"].isin(config["filing_types"])]
     
-    if len(filings_metadata_df) == 0:
+    if cik is not None:
+        filings_metadata_df = filings_metadata_df[filings_metadata_df["CIK"] == str(cik)]
+
+    if len(filings_metadata_df) == 0 and not merge_only:
         LOGGER.info(f"No filings to process for filing types {config['filing_types']}.")
         return
 
@@ -892,21 +902,17 @@ def main() -> None:
         return
 
     extracted_filings_folder = os.path.join(DATASET_DIR, config["extracted_filings_folder"])
-    if not os.path.isdir(extracted_filings_folder):
-        os.mkdir(extracted_filings_folder)
+    os.makedirs(extracted_filings_folder, exist_ok=True)
 
     # Create output folders
     parquet_folder = os.path.join(DATASET_DIR, config["parquet_folder"])
-    if not os.path.isdir(parquet_folder):
-        os.mkdir(parquet_folder)
+    os.makedirs(parquet_folder, exist_ok=True)
 
     csv_folder = os.path.join(DATASET_DIR, config["csv_folder"])
-    if not os.path.isdir(csv_folder):
-        os.mkdir(csv_folder)
+    os.makedirs(csv_folder, exist_ok=True)
 
     merged_folder = os.path.join(DATASET_DIR, config["merged_parquet_file"])
-    if not os.path.isdir(merged_folder):
-        os.mkdir(merged_folder)
+    os.makedirs(merged_folder, exist_ok=True)
 
     extraction = ExtractItems(
         remove_tables=config["remove_tables"],
@@ -917,78 +923,96 @@ def main() -> None:
         skip_extracted_filings=config["skip_extracted_filings"],
     )
 
-    LOGGER.info(f"Starting the structured JSON extraction from {len(filings_metadata_df)} unstructured EDGAR filings.")
-
-    list_of_series = list(zip(*filings_metadata_df.iterrows()))[1]
+    processed = []
+    converted_count = 0
 
-    # STEP 1: Extract items and save as JSON
-    with ProcessPool(processes=1) as pool:
-        processed = list(
-            tqdm(
-                pool.imap(extraction.process_filing, list_of_series),
-                total=len(list_of_series),
-                ncols=100,
-                desc="Extracting items"
+    if merge_only:
+        # The per-company shards already extracted and converted everything
+        LOGGER.info("Merge-only run: skipping extraction and conversion.")
+        filing_types_found = [
+            item for item in os.listdir(extracted_filings_folder)
+            if os.path.isdir(os.path.join(extracted_filings_folder, item))
+        ]
+    else:
+        LOGGER.info(f"Starting the structured JSON extraction from {len(filings_metadata_df)} unstructured EDGAR filings.")
+
+        list_of_series = list(zip(*filings_metadata_df.iterrows()))[1]
+
+        # STEP 1: Extract items and save as JSON
+        with ProcessPool(processes=1) as pool:
+            processed = list(
+                tqdm(
+                    pool.imap(extraction.process_filing, list_of_series),
+                    total=len(list_of_series),
+                    ncols=100,
+                    desc="Extracting items"
+                )
             )
-        )
 
-    LOGGER.info("\nItem extraction is completed successfully.")
-    LOGGER.info(f"{sum(processed)} files were processed.")
-    LOGGER.info(f"Extracted filings are saved to: {extracted_filings_folder}")
+        LOGGER.info("\nItem extraction is completed successfully.")
+        LOGGER.info(f"{sum(processed)} files were processed.")
+        LOGGER.info(f"Extracted filings are saved to: {extracted_filings_folder}")
 
-    # STEP 2: Convert JSON files to CSV/Parquet
-    LOGGER.info("\nStarting conversion of JSON files to CSV/Parquet format...")
-    
-    # Get all filing types from the extracted filings folder
-    json_files = []
-    filing_types_found = []
-    
-    # Check what filing type folders actually exist
-    if os.path.exists(extracted_filings_folder):
-        for item in os.listdir(extracted_filings_folder):
-            item_path = os.path.join(extracted_filings_folder, item)
-            if os.path.isdir(item_path):
-                filing_types_found.append(item)
-                # Get all JSON files in this folder
-                for f in os.listdir(item_path):
-                    if f.endswith(".json"):
-                        json_files.append(os.path.join(item_path, f))
-    
-    if not json_files:
-        LOGGER.info(f"No JSON files found in {extracted_filings_folder}")
-        LOGGER.info(f"Filing type folders found: {filing_types_found}")
-        return
-    
-    LOGGER.info(f"Found {len(json_files)} JSON files to convert across {len(filing_types_found)} filing types")
+        # STEP 2: Convert JSON files to CSV/Parquet
+        LOGGER.info("\nStarting conversion of JSON files to CSV/Parquet format...")
 
-    # Create subfolder for parquet files by filing type
-    converted_count = 0
-    failed_count = 0
-    
-    for json_file in tqdm(json_files, desc="Converting to Parquet", ncols=100):
-        try:
-            #filing_type = Path(json_file).parent.name
-            #output_folder = os.path.join(parquet_folder)
-            
-            if convert_json_to_parquet(
-                json_path=json_file,
-                csv_output_folder=os.path.join(csv_folder),
-                parquet_output_folder=os.path.join(parquet_folder),
-                min_year=config.get("min_year", 2021),
-                max_year=config.get("max_year", 2025)
-            ):
-                converted_count += 1
-            else:
+        json_files = []
+        filing_types_found = []
+
+        if cik is not None:
+            # Only this company's JSONs; the other shards convert their own
+            for _, series in filings_metadata_df.iterrows():
+                json_path = os.path.join(
+                    extracted_filings_folder, series["Type"], f'{series["filename"].split(".")[0]}.json'
+                )
+                if os.path.exists(json_path):
+                    json_files.append(json_path)
+            filing_types_found = sorted(filings_metadata_df["Type"].unique())
+        else:
+            # Check what filing type folders actually exist
+            for item in os.listdir(extracted_filings_folder):
+                item_path = os.path.join(extracted_filings_folder, item)
+                if os.path.isdir(item_path):
+                    filing_types_found.append(item)
+                    # Get all JSON files in this folder
+                    for f in os.listdir(item_path):
+                        if f.endswith(".json"):
+                            json_files.append(os.path.join(item_path, f))
+
+        if not json_files:
+            LOGGER.info(f"No JSON files found in {extracted_filings_folder}")
+            LOGGER.info(f"Filing type folders found: {filing_types_found}")
+            return
+
+        LOGGER.info(f"Found {len(json_files)} JSON files to convert across {len(filing_types_found)} filing types")
+
+        failed_count = 0
+
+        for json_file in tqdm(json_files, desc="Converting to Parquet", ncols=100):
+            try:
+                if convert_json_to_parquet(
+                    json_path=json_file,
+                    csv_output_folder=os.path.join(csv_folder),
+                    parquet_output_folder=os.path.join(parquet_folder),
+                    min_year=config.get("min_year", 2021),
+                    max_year=config.get("max_year", 2025)
+                ):
+                    converted_count += 1
+                else:
+                    failed_count += 1
+            except Exception as e:
+                LOGGER.warning(f"Error converting {json_file}: {e}")
                 failed_count += 1
-        except Exception as e:
-            LOGGER.warning(f"Error converting {json_file}: {e}")
-            failed_count += 1
 
-    LOGGER.info(f"\nConversion completed.")
-    LOGGER.info(f"{converted_count} JSON files were converted to CSV/Parquet format.")
-    if failed_count > 0:
-        LOGGER.info(f"{failed_count} files were skipped or failed conversion.")
-    LOGGER.info(f"Parquet files are saved to: {parquet_folder}")
+        LOGGER.info(f"\nConversion completed.")
+        LOGGER.info(f"{converted_count} JSON files were converted to CSV/Parquet format.")
+        if failed_count > 0:
+            LOGGER.info(f"{failed_count} files were skipped or failed conversion.")
+        LOGGER.info(f"Parquet files are saved to: {parquet_folder}")
+
+        if cik is not None:
+            LOGGER.info(f"CIK {cik} done; the merge runs once every company has finished.")
+            return
 
     # STEP 3: Merge all parquet files by filing type
     LOGGER.info("\nStarting to merge parquet files by filing type...")
@@ -1065,4 +1089,10 @@ def main() -> None:
     LOGGER.info(f"{'='*80}")
     
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract SEC filing items and convert them to parquet")
+    parser.add_argument("--cik", help="Only process this company's filings and skip the merge")
+    parser.add_argument("--merge-only", action="store_true", help="Only merge already converted parquet files")
+    args = parser.parse_args()
+    main(cik=args.cik, merge_only=args.merge_only)
\ No newline at end of file
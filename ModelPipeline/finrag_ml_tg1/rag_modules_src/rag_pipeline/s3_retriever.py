@@ -59,6 +59,7 @@ from typing import List, Dict, Any, Optional
 from collections import defaultdict
 import logging
 
+import numpy as np
 import boto3
 from botocore.exceptions import ClientError
 
@@ -156,7 +157,7 @@ class S3VectorsRetriever:
     
     def retrieve(
         self,
-        base_embedding: List[float],
+        base_embedding: np.ndarray,
         base_query: str,
         filtered_filters: Optional[Dict[str, Any]],
         global_filters: Optional[Dict[str, Any]]
@@ -172,7 +173,8 @@ class S3VectorsRetriever:
         5. Bundle assembly
         
         Args:
-            base_embedding: Query embedding vector (1024-d float32)
+            base_embedding: Query embedding, float32 ndarray of shape (1024,)
+                (QueryEmbedderV2.embed_query output)
             base_query: Original user query string (needed for variant generation)
             filtered_filters: Strong metadata filters (company, year, section)
             global_filters: Relaxed metadata filters (company, year >= threshold)
@@ -183,7 +185,7 @@ class S3VectorsRetriever:
         
         Example:
             >>> bundle = retriever.retrieve(
-            ...     base_embedding=[0.01, -0.02, ...],  # 1024-d
+            ...     base_embedding=embedder.embed_query(query, entities),  # (1024,) float32
             ...     base_query="What was NVIDIA's revenue in 2021?",
             ...     filtered_filters={"cik_int": {"$in": [1045810]}, ...},
             ...     global_filters={"cik_int": {"$in": [1045810]}, "report_year": {"$gte": 2015}}
@@ -284,7 +286,7 @@ class S3VectorsRetriever:
     
     def _retrieve_for_embedding(
         self,
-        embedding: List[float],
+        embedding: np.ndarray,
         filtered_filters: Optional[Dict[str, Any]],
         global_filters: Optional[Dict[str, Any]],
         variant_id: int,
@@ -296,7 +298,7 @@ class S3VectorsRetriever:
         Run filtered + optional global retrieval for one embedding.
         
         Args:
-            embedding: Query vector (1024-d)
+            embedding: Query vector, float32 ndarray of shape (1024,)
             filtered_filters: Strong metadata filters
             global_filters: Relaxed metadata filters
             variant_id: 0 = base, 1+ = variants
@@ -352,7 +354,7 @@ class S3VectorsRetriever:
     
     def _call_s3_vectors(
         self,
-        embedding: List[float],
+        embedding: np.ndarray,
         filters: Optional[Dict[str, Any]],
         top_k: int
     ) -> Dict[str, Any]:
@@ -360,7 +362,7 @@ class S3VectorsRetriever:
         Raw S3 Vectors QueryVectors API call.
         
         Args:
-            embedding: Query vector (1024-d float32)
+            embedding: Query vector, float32 ndarray of shape (1024,)
             filters: Metadata filter JSON (or None for open retrieval)
             top_k: Maximum results to return
         
@@ -373,7 +375,8 @@ class S3VectorsRetriever:
         params = {
             "vectorBucketName": self.vector_bucket,
             "indexName": self.index_name,
-            "queryVector": {"float32": embedding},
+            # QueryEmbedderV2 returns float32 ndarrays; the API wants a JSON list
+            "queryVector": {"float32": embedding.tolist() if hasattr(embedding, "tolist") else embedding},
             "topK": top_k,
             "returnMetadata": True,
             "returnDistance": True
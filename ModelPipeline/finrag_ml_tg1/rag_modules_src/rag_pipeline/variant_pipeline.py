@@ -10,7 +10,7 @@ Architecture:
     For each variant:
         variant → EntityAdapter.extract() → EntityExtractionResult
                ↓
-        variant + entities → QueryEmbedderV2.embed_query() → 1024-d embedding
+        variant + entities → QueryEmbedderV2.embed_query() → (1024,) float32 ndarray
          ↓
     Return: (variant_queries, variant_embeddings) → S3VectorsRetriever
 
@@ -38,6 +38,8 @@ Date: November 2024
 from typing import List, Tuple, Optional
 import logging
 
+import numpy as np
+
 from finrag_ml_tg1.loaders.ml_config_loader import MLConfig
 from finrag_ml_tg1.rag_modules_src.entity_adapter.entity_adapter import EntityAdapter
 from finrag_ml_tg1.rag_modules_src.utilities.query_embedder_v2 import QueryEmbedderV2
@@ -120,7 +122,7 @@ class VariantPipeline:
     def generate(
         self, 
         base_query: str
-    ) -> Tuple[List[str], List[List[float]]]:
+    ) -> Tuple[List[str], List[np.ndarray]]:
         """
         Generate semantic variants and embed each one.
         
@@ -140,7 +142,7 @@ class VariantPipeline:
         Returns:
             Tuple of:
             - variant_queries: List[str] of generated variant strings (may be empty)
-            - variant_embeddings: List[List[float]] of 1024-d embeddings (may be empty)
+            - variant_embeddings: List[np.ndarray] of (1024,) float32 embeddings (may be empty)
             
             Both lists will have same length (one embedding per query).
             If variants disabled, both lists are empty (no LLM calls, no cost).
@@ -150,8 +152,8 @@ class VariantPipeline:
             >>> vq, ve = pipeline.generate("What was NVDA revenue in 2021?")
             >>> len(vq), len(ve)
             (3, 3)
-            >>> len(ve[0])
-            1024
+            >>> ve[0].shape, ve[0].dtype
+            ((1024,), dtype('float32'))
         """
         # ════════════════════════════════════════════════════════════════════
         # FAST PATH 1: Variants disabled
@@ -340,12 +342,12 @@ def create_variant_pipeline(config: MLConfig) -> VariantPipeline:
 
 """
 Input:  base_query (str)
-Output: (variant_queries: List[str], variant_embeddings: List[List[float]])
+Output: (variant_queries: List[str], variant_embeddings: List[np.ndarray])
 
 Process:
 1. VariantGenerator.generate(base_query) → ["variant1", "variant2", "variant3"]
 2. For each variant:
    - EntityAdapter.extract(variant) → EntityExtractionResult
-   - QueryEmbedderV2.embed_query(variant, entities) → 1024-d embedding
+   - QueryEmbedderV2.embed_query(variant, entities) → (1024,) float32 ndarray
 3. Return both lists (queries for logging, embeddings for retrieval)
 """
\ No newline at end of file
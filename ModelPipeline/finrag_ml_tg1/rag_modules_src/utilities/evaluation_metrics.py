@@ -11,6 +11,7 @@ Includes per-metric timing for performance analysis.
 """
 
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Union, List
 from bert_score import score as bert_score
@@ -36,6 +37,12 @@ SENTENCE_MODEL = SentenceTransformer('all-MiniLM-L6-v2')  # 80MB
 ROUGE_SCORER = rouge_scorer.RougeScorer(['rougeL'], use_stemmer=True)
 
 
+@lru_cache(maxsize=4096)
+def _rouge_cached(gold: str, synth: str) -> float:
+    """ROUGE-L F-measure, memoized so repeated gold/synthesis pairs skip re-stemming."""
+    return ROUGE_SCORER.score(gold, synth)['rougeL'].fmeasure
+
+
 def evaluate_answer(
     gold_answer: Union[str, List[str]],
     synthesis_answer: str,
@@ -51,6 +58,9 @@ def evaluate_answer(
         include_bleurt: Whether to compute BLEURT (slower, ~5s)
         include_timing: Whether to include per-metric timing
     
+    ROUGE-L scores are memoized per (gold, synthesis) pair, so a repeated pair
+    is not re-scored and its timing carries no rouge_l_ms entry.
+    
     Returns:
         Dictionary with scores and optional timing:
         {
@@ -60,7 +70,7 @@ def evaluate_answer(
             "bleurt": 0.756,  (if include_bleurt=True)
             "interpretation": "Excellent semantic match",
             "timing": {  (if include_timing=True)
-                "rouge_l_ms": 45.2,
+                "rouge_l_ms": 45.2,  (absent when the ROUGE-L score was cached)
                 "bertscore_ms": 2341.8,
                 "cosine_ms": 18.3,
                 "bleurt_ms": 4823.1,
@@ -75,11 +85,11 @@ def evaluate_answer(
     if isinstance(gold_answer, list):
         gold_answer = "\n\n".join(gold_answer)
     
-    # 1. ROUGE-L (fast, ~50ms)
+    # 1. ROUGE-L (fast, ~50ms; a cache hit is not timed)
+    hits_before = _rouge_cached.cache_info().hits
     t0 = time.perf_counter()
-    rouge_scores = ROUGE_SCORER.score(gold_answer, synthesis_answer)
-    results['rouge_l'] = round(rouge_scores['rougeL'].fmeasure, 3)
-    if include_timing:
+    results['rouge_l'] = round(_rouge_cached(gold_answer, synthesis_answer), 3)
+    if include_timing and _rouge_cached.cache_info().hits == hits_before:
         timing['rouge_l_ms'] = round((time.perf_counter() - t0) * 1000, 1)
     
     # 2. BERTScore F1 (accurate, ~2-3s on CPU)
@@ -125,6 +135,7 @@ def evaluate_answer(
     return results
 
 
+@lru_cache(maxsize=None)
 def _interpret_bertscore(bertscore_f1: float) -> str:
     """Interpret BERTScore F1 into human-readable quality level."""
     if bertscore_f1 >= 0.90:
@@ -8,10 +8,305 @@ Provides clean, scrollable HTML rendering for query/answer comparisons
 without emojis or excessive decoration.
 """
 
+from functools import lru_cache
 from html import escape
+from string import Template
 from typing import Optional, Dict, List, Any
+from IPython import get_ipython
 from IPython.display import HTML, display
 
+# Memoized escape for short, highly repeated strings (question IDs, metadata
+# keys/values). Long bodies (answers, logs) still go through plain escape().
+_escape = lru_cache(maxsize=1024)(escape)
+
+
+# ----------------------------------------------------------------------------
+# Stylesheet (injected once per executed cell)
+# ----------------------------------------------------------------------------
+# Per-card sizing is passed through CSS custom properties on the outer <div>
+# (--qa-max-height / --qa-wrap-width), so cards never re-emit the stylesheet.
+
+_QA_CSS = """
+<style>
+    .qa-comparison {
+        font-family: 'Consolas', 'Courier New', monospace;
+        background-color: #1e1e1e;
+        border: 2px solid #3794ff;
+        border-radius: 6px;
+        overflow: hidden;
+        margin: 15px 0;
+        color: #d4d4d4;
+    }
+    .qa-header {
+        background: #2d2d30;
+        padding: 12px 20px;
+        border-bottom: 1px solid #3794ff;
+    }
+    .qa-id {
+        color: #4EC9B0;
+        font-weight: bold;
+        font-size: 16px;
+        margin-bottom: 8px;
+    }
+    .qa-question {
+        color: #d4d4d4;
+        line-height: 1.6;
+        margin-bottom: 10px;
+        white-space: pre-wrap;
+        word-wrap: break-word;
+        max-width: var(--qa-wrap-width, 95%);
+    }
+    .qa-metadata {
+        color: #808080;
+        font-size: 11px;
+        padding-top: 8px;
+        border-top: 1px solid #3e3e42;
+    }
+    .meta-item {
+        margin-right: 12px;
+    }
+    .qa-body {
+        display: grid;
+        grid-template-columns: 1fr 1fr;
+        gap: 1px;
+        background: #3e3e42;
+    }
+    .qa-column {
+        background: #252526;
+        padding: 15px 20px;
+        max-height: var(--qa-max-height, 400px);
+        overflow-y: auto;
+    }
+    .qa-column-label {
+        color: #4EC9B0;
+        font-weight: bold;
+        font-size: 13px;
+        margin-bottom: 10px;
+        position: sticky;
+        top: 0;
+        background: #252526;
+        padding-bottom: 8px;
+        border-bottom: 1px solid #3e3e42;
+    }
+    .qa-content {
+        color: #d4d4d4;
+        line-height: 1.7;
+        white-space: pre-wrap;
+        word-wrap: break-word;
+        font-size: 13px;
+    }
+    .logs-details {
+        background: #252526;
+        border-top: 1px solid #3e3e42;
+        padding: 15px 20px;
+    }
+    .logs-summary {
+        color: #4EC9B0;
+        font-weight: bold;
+        font-size: 13px;
+        cursor: pointer;
+        padding: 5px 0;
+        user-select: none;
+    }
+    .logs-summary:hover {
+        color: #6CD9C0;
+    }
+    .logs-content {
+        margin-top: 10px;
+        padding: 15px;
+        background: #1e1e1e;
+        border-radius: 4px;
+        color: #d4d4d4;
+        font-size: 12px;
+        line-height: 1.6;
+        white-space: pre-wrap;
+        max-height: 300px;
+        overflow-y: auto;
+    }
+    .qa-column::-webkit-scrollbar,
+    .logs-content::-webkit-scrollbar {
+        width: 8px;
+    }
+    .qa-column::-webkit-scrollbar-track,
+    .logs-content::-webkit-scrollbar-track {
+        background: #1e1e1e;
+    }
+    .qa-column::-webkit-scrollbar-thumb,
+    .logs-content::-webkit-scrollbar-thumb {
+        background: #424242;
+        border-radius: 4px;
+    }
+    .qa-column::-webkit-scrollbar-thumb:hover,
+    .logs-content::-webkit-scrollbar-thumb:hover {
+        background: #4e4e4e;
+    }
+    .synthesis-result {
+        font-family: 'Consolas', 'Courier New', monospace;
+        background-color: #1e1e1e;
+        border: 2px solid #4CAF50;
+        border-radius: 6px;
+        overflow: hidden;
+        margin: 15px 0;
+        color: #d4d4d4;
+    }
+    .synthesis-question {
+        padding: 15px 20px;
+        background: #2d2d30;
+        border-bottom: 1px solid #4CAF50;
+    }
+    .synthesis-question-label {
+        color: #4EC9B0;
+        font-weight: bold;
+        font-size: 13px;
+        margin-bottom: 8px;
+    }
+    .synthesis-question-text {
+        color: #d4d4d4;
+        line-height: 1.6;
+        white-space: pre-wrap;
+        word-wrap: break-word;
+        font-size: 13px;
+        max-width: var(--qa-wrap-width, 95%);
+    }
+    .synthesis-response {
+        padding: 15px 20px;
+        background: #252526;
+        max-height: var(--qa-max-height, 500px);
+        overflow-y: auto;
+    }
+    .synthesis-response-label {
+        color: #4EC9B0;
+        font-weight: bold;
+        font-size: 13px;
+        margin-bottom: 10px;
+        position: sticky;
+        top: 0;
+        background: #252526;
+        padding-bottom: 8px;
+        border-bottom: 1px solid #3e3e42;
+    }
+    .synthesis-content {
+        color: #d4d4d4;
+        line-height: 1.7;
+        white-space: pre-wrap;
+        word-wrap: break-word;
+        font-size: 13px;
+    }
+    .synthesis-metadata {
+        padding: 10px 20px;
+        background: #2d2d30;
+        border-top: 1px solid #3e3e42;
+        color: #808080;
+        font-size: 11px;
+    }
+    .synthesis-response::-webkit-scrollbar {
+        width: 8px;
+    }
+    .synthesis-response::-webkit-scrollbar-track {
+        background: #1e1e1e;
+    }
+    .synthesis-response::-webkit-scrollbar-thumb {
+        background: #424242;
+        border-radius: 4px;
+    }
+    .synthesis-response::-webkit-scrollbar-thumb:hover {
+        background: #4e4e4e;
+    }
+</style>
+"""
+
+# IPython execution_count of the cell whose output holds the stylesheet
+_CSS_CELL: Optional[int] = None
+
+
+def _ensure_css() -> None:
+    """
+    Emit the shared stylesheet on first use in each executed cell.
+
+    The <style> tag lives in the output of the cell that emitted it, so once
+    that output is cleared (or the cell re-run) later cards would be unstyled;
+    re-emitting whenever execution_count moves on keeps every card styled.
+    Outside IPython it is emitted once.
+    """
+    global _CSS_CELL
+    shell = get_ipython()
+    cell = shell.execution_count if shell is not None else 0
+    if cell != _CSS_CELL:
+        display(HTML(_QA_CSS))
+        _CSS_CELL = cell
+
+
+# ----------------------------------------------------------------------------
+# Card templates (compiled once; per-call work is a dict substitution)
+# ----------------------------------------------------------------------------
+
+_CARD_TEMPLATE = Template("""
+    <div class="qa-comparison" style="--qa-max-height: $max_height; --qa-wrap-width: $wrap_width;">
+        <div class="qa-header">
+            <div class="qa-id">TEST: $question_id</div>
+            <div class="qa-question">$question_text</div>
+            $meta
+        </div>
+        
+        <div class="qa-body">
+            <div class="qa-column">
+                <div class="qa-column-label">GOLD REFERENCE ANSWER</div>
+                <div class="qa-content">$gold</div>
+            </div>
+            
+            <div class="qa-column">
+                <div class="qa-column-label">LLM SYNTHESIS OUTPUT</div>
+                <div class="qa-content">$synth</div>
+            </div>
+        </div>
+        
+        $logs
+    </div>
+    """)
+
+_SYNTHESIS_TEMPLATE = Template("""
+    <div class="synthesis-result" style="--qa-max-height: $max_height; --qa-wrap-width: $wrap_width;">
+        <div class="synthesis-question">
+            <div class="synthesis-question-label">USER QUERY</div>
+            <div class="synthesis-question-text">$question_text</div>
+        </div>
+        
+        <div class="synthesis-response">
+            <div class="synthesis-response-label">LLM SYNTHESIS</div>
+            <div class="synthesis-content">$synth</div>
+        </div>
+        
+        $meta
+    </div>
+    """)
+
+_META_TMPL = Template("<span class='meta-item'><strong>$k:</strong> $v</span>")
+
+_SYNTH_META_TMPL = Template("<strong>$k:</strong> $v")
+
+_GOLD_ITEM_SEP = "<br><br>"
+
+
+def _fmt_gold_item(i_item) -> str:
+    """Render one (index, text) pair of a list-typed gold answer."""
+    i, item = i_item
+    return f"<strong>Item {i+1}:</strong><br>{escape(item)}"
+
+
+def _meta_val(val: Any) -> str:
+    """Flatten a metadata value to text (lists become comma-joined)."""
+    if isinstance(val, list):
+        return ", ".join([str(v) for v in val])
+    return str(val)
+
+
+_LOGS_TEMPLATE = Template("""
+        <details class="logs-details" open>
+            <summary class="logs-summary">EXECUTION LOGS & METADATA</summary>
+            <div class="logs-content">$logs</div>
+        </details>
+        """)
+
 
 def display_qa_comparison(
     question_id: str,
@@ -28,178 +323,43 @@ def display_qa_comparison(
     - Top: Gold vs LLM side-by-side
     - Bottom: Expandable stdout logs section
     """
+    _ensure_css()
+
     # Sanitize inputs
-    question_id_safe = escape(question_id)
+    question_id_safe = _escape(question_id)
     question_text_safe = escape(question_text)
     synthesis_output_safe = escape(synthesis_output)
     stdout_logs_safe = escape(stdout_logs) if stdout_logs else ""
 
     # Handle gold answer (may be list or string)
     if isinstance(gold_answer, list):
-        gold_answer_html = "<br><br>".join([f"<strong>Item {i+1}:</strong><br>{escape(item)}" for i, item in enumerate(gold_answer)])
+        gold_answer_html = _GOLD_ITEM_SEP.join(map(_fmt_gold_item, enumerate(gold_answer)))
     else:
         gold_answer_html = escape(gold_answer)
 
     # Build metadata section
     meta_html = ""
     if metadata:
-        meta_items = []
-        for key, val in metadata.items():
-            if isinstance(val, list):
-                val_str = ", ".join(str(v) for v in val)
-            else:
-                val_str = str(val)
-            meta_items.append(f"<span class='meta-item'><strong>{escape(key)}:</strong> {escape(val_str)}</span>")
-        meta_html = " | ".join(meta_items)
+        meta_html = " | ".join([
+            _META_TMPL.substitute(k=_escape(key), v=_escape(_meta_val(val)))
+            for key, val in metadata.items()
+        ])
 
     # Logs section (collapsible)
     logs_section = ""
     if stdout_logs:
-        logs_section = f"""
-        <details class="logs-details" open>
-            <summary class="logs-summary">EXECUTION LOGS & METADATA</summary>
-            <div class="logs-content">{stdout_logs_safe}</div>
-        </details>
-        """
-
-    html = f"""
-    <style>
-        .qa-comparison {{
-            font-family: 'Consolas', 'Courier New', monospace;
-            background-color: #1e1e1e;
-            border: 2px solid #3794ff;
-            border-radius: 6px;
-            overflow: hidden;
-            margin: 15px 0;
-            color: #d4d4d4;
-        }}
-        .qa-header {{
-            background: #2d2d30;
-            padding: 12px 20px;
-            border-bottom: 1px solid #3794ff;
-        }}
-        .qa-id {{
-            color: #4EC9B0;
-            font-weight: bold;
-            font-size: 16px;
-            margin-bottom: 8px;
-        }}
-        .qa-question {{
-            color: #d4d4d4;
-            line-height: 1.6;
-            margin-bottom: 10px;
-            white-space: pre-wrap;
-            word-wrap: break-word;
-            max-width: {wrap_width};
-        }}
-        .qa-metadata {{
-            color: #808080;
-            font-size: 11px;
-            padding-top: 8px;
-            border-top: 1px solid #3e3e42;
-        }}
-        .meta-item {{
-            margin-right: 12px;
-        }}
-        .qa-body {{
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 1px;
-            background: #3e3e42;
-        }}
-        .qa-column {{
-            background: #252526;
-            padding: 15px 20px;
-            max-height: {max_height};
-            overflow-y: auto;
-        }}
-        .qa-column-label {{
-            color: #4EC9B0;
-            font-weight: bold;
-            font-size: 13px;
-            margin-bottom: 10px;
-            position: sticky;
-            top: 0;
-            background: #252526;
-            padding-bottom: 8px;
-            border-bottom: 1px solid #3e3e42;
-        }}
-        .qa-content {{
-            color: #d4d4d4;
-            line-height: 1.7;
-            white-space: pre-wrap;
-            word-wrap: break-word;
-            font-size: 13px;
-        }}
-        .logs-details {{
-            background: #252526;
-            border-top: 1px solid #3e3e42;
-            padding: 15px 20px;
-        }}
-        .logs-summary {{
-            color: #4EC9B0;
-            font-weight: bold;
-            font-size: 13px;
-            cursor: pointer;
-            padding: 5px 0;
-            user-select: none;
-        }}
-        .logs-summary:hover {{
-            color: #6CD9C0;
-        }}
-        .logs-content {{
-            margin-top: 10px;
-            padding: 15px;
-            background: #1e1e1e;
-            border-radius: 4px;
-            color: #d4d4d4;
-            font-size: 12px;
-            line-height: 1.6;
-            white-space: pre-wrap;
-            max-height: 300px;
-            overflow-y: auto;
-        }}
-        .qa-column::-webkit-scrollbar,
-        .logs-content::-webkit-scrollbar {{
-            width: 8px;
-        }}
-        .qa-column::-webkit-scrollbar-track,
-        .logs-content::-webkit-scrollbar-track {{
-            background: #1e1e1e;
-        }}
-        .qa-column::-webkit-scrollbar-thumb,
-        .logs-content::-webkit-scrollbar-thumb {{
-            background: #424242;
-            border-radius: 4px;
-        }}
-        .qa-column::-webkit-scrollbar-thumb:hover,
-        .logs-content::-webkit-scrollbar-thumb:hover {{
-            background: #4e4e4e;
-        }}
-    </style>
-
-    <div class="qa-comparison">
-        <div class="qa-header">
-            <div class="qa-id">TEST: {question_id_safe}</div>
-            <div class="qa-question">{question_text_safe}</div>
-            {f'<div class="qa-metadata">{meta_html}</div>' if meta_html else ''}
-        </div>
-        
-        <div class="qa-body">
-            <div class="qa-column">
-                <div class="qa-column-label">GOLD REFERENCE ANSWER</div>
-                <div class="qa-content">{gold_answer_html}</div>
-            </div>
-            
-            <div class="qa-column">
-                <div class="qa-column-label">LLM SYNTHESIS OUTPUT</div>
-                <div class="qa-content">{synthesis_output_safe}</div>
-            </div>
-        </div>
-        
-        {logs_section}
-    </div>
-    """
+        logs_section = _LOGS_TEMPLATE.substitute(logs=stdout_logs_safe)
+
+    html = _CARD_TEMPLATE.substitute(
+        max_height=max_height,
+        wrap_width=wrap_width,
+        question_id=question_id_safe,
+        question_text=question_text_safe,
+        meta=f'<div class="qa-metadata">{meta_html}</div>' if meta_html else '',
+        gold=gold_answer_html,
+        synth=synthesis_output_safe,
+        logs=logs_section,
+    )
 
     display(HTML(html))
 
@@ -222,6 +382,8 @@ def display_synthesis_result(
         max_height: CSS height for scrollable response area
         wrap_width: CSS width constraint for text wrapping
     """
+    _ensure_css()
+
     # Sanitize inputs
     question_text_safe = escape(question_text)
     synthesis_output_safe = escape(synthesis_output)
@@ -229,98 +391,15 @@ def display_synthesis_result(
     # Build metadata footer
     meta_html = ""
     if metadata:
-        meta_items = [f"<strong>{escape(str(k))}:</strong> {escape(str(v))}" for k, v in metadata.items()]
+        meta_items = [_SYNTH_META_TMPL.substitute(k=_escape(str(k)), v=_escape(str(v))) for k, v in metadata.items()]
         meta_html = " | ".join(meta_items)
 
-    html = f"""
-    <style>
-        .synthesis-result {{
-            font-family: 'Consolas', 'Courier New', monospace;
-            background-color: #1e1e1e;
-            border: 2px solid #4CAF50;
-            border-radius: 6px;
-            overflow: hidden;
-            margin: 15px 0;
-            color: #d4d4d4;
-        }}
-        .synthesis-question {{
-            padding: 15px 20px;
-            background: #2d2d30;
-            border-bottom: 1px solid #4CAF50;
-        }}
-        .synthesis-question-label {{
-            color: #4EC9B0;
-            font-weight: bold;
-            font-size: 13px;
-            margin-bottom: 8px;
-        }}
-        .synthesis-question-text {{
-            color: #d4d4d4;
-            line-height: 1.6;
-            white-space: pre-wrap;
-            word-wrap: break-word;
-            font-size: 13px;
-            max-width: {wrap_width};
-        }}
-        .synthesis-response {{
-            padding: 15px 20px;
-            background: #252526;
-            max-height: {max_height};
-            overflow-y: auto;
-        }}
-        .synthesis-response-label {{
-            color: #4EC9B0;
-            font-weight: bold;
-            font-size: 13px;
-            margin-bottom: 10px;
-            position: sticky;
-            top: 0;
-            background: #252526;
-            padding-bottom: 8px;
-            border-bottom: 1px solid #3e3e42;
-        }}
-        .synthesis-content {{
-            color: #d4d4d4;
-            line-height: 1.7;
-            white-space: pre-wrap;
-            word-wrap: break-word;
-            font-size: 13px;
-        }}
-        .synthesis-metadata {{
-            padding: 10px 20px;
-            background: #2d2d30;
-            border-top: 1px solid #3e3e42;
-            color: #808080;
-            font-size: 11px;
-        }}
-        .synthesis-response::-webkit-scrollbar {{
-            width: 8px;
-        }}
-        .synthesis-response::-webkit-scrollbar-track {{
-            background: #1e1e1e;
-        }}
-        .synthesis-response::-webkit-scrollbar-thumb {{
-            background: #424242;
-            border-radius: 4px;
-        }}
-        .synthesis-response::-webkit-scrollbar-thumb:hover {{
-            background: #4e4e4e;
-        }}
-    </style>
-
-    <div class="synthesis-result">
-        <div class="synthesis-question">
-            <div class="synthesis-question-label">USER QUERY</div>
-            <div class="synthesis-question-text">{question_text_safe}</div>
-        </div>
-        
-        <div class="synthesis-response">
-            <div class="synthesis-response-label">LLM SYNTHESIS</div>
-            <div class="synthesis-content">{synthesis_output_safe}</div>
-        </div>
-        
-        {f'<div class="synthesis-metadata">{meta_html}</div>' if meta_html else ''}
-    </div>
-    """
+    html = _SYNTHESIS_TEMPLATE.substitute(
+        max_height=max_height,
+        wrap_width=wrap_width,
+        question_text=question_text_safe,
+        synth=synthesis_output_safe,
+        meta=f'<div class="synthesis-metadata">{meta_html}</div>' if meta_html else '',
+    )
 
     display(HTML(html))
\ No newline at end of file
@@ -14,14 +14,25 @@ Creates boto3 client directly with passed parameters
 # Complex parsing due to v3/v4 format differences:
     # v4: {"embeddings": {"float": [[...]]}}
     # v3: {"embeddings": [[...]]}
-##  return embedding  # List[float]
+##  return embedding  # np.ndarray (float32, shape (dim,))
 """
 
+import asyncio
 import boto3
 import json
+import time
+import uuid
+import numpy as np
+from botocore.config import Config
 from typing import List
 import logging
 
+try:
+    import orjson
+    _loads = orjson.loads          # C parser: ~4-6x faster on 1536-d float payloads
+except ImportError:
+    _loads = json.loads
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,19 +40,39 @@ class QueryEmbedder:
     """Handles conversion of user queries to embeddings using Cohere via AWS Bedrock."""
     
     def __init__(self, region: str = "us-east-1", 
-                 model_id: str = "cohere.embed-v4:0"):
+                 model_id: str = "cohere.embed-v4:0",
+                 max_concurrency: int = 16):
         """
         Initialize Bedrock client for Cohere embeddings.
         
         Args:
             region: AWS region
             model_id: Cohere embedding model ID in Bedrock
+            max_concurrency: Expected number of concurrent callers; sizes the
+                HTTP connection pool (2x) so requests don't queue on it
         """
-        self.client = boto3.client('bedrock-runtime', region_name=region)
+        # Adaptive retries back off on ThrottlingException (429) client-side;
+        # keep-alive lets pooled connections reuse their TLS session.
+        # The async client (aembed_batch) is built from the same settings.
+        self._boto_cfg_kwargs = dict(
+            region_name=region,
+            max_pool_connections=max_concurrency * 2,
+            retries={'max_attempts': 8, 'mode': 'adaptive'},
+            read_timeout=30,
+            tcp_keepalive=True,
+        )
+        self.client = boto3.client('bedrock-runtime', config=Config(**self._boto_cfg_kwargs))
+        self.region = region
+        # One aioboto3 client per embedder, opened on first aembed_batch and
+        # bound to that event loop (see _get_async_client / aclose)
+        self._async_client = None
+        self._async_client_cm = None
+        self._async_loop = None
+        self._async_lock = None
         self.model_id = model_id
         logger.info(f"Initialized QueryEmbedder with Bedrock model: {model_id}")
     
-    def embed_query(self, query: str, input_type: str = "search_query") -> List[float]:
+    def embed_query(self, query: str, input_type: str = "search_query") -> np.ndarray:
         """
         Convert a single query to embedding vector via Bedrock.
         
@@ -50,7 +81,7 @@ class QueryEmbedder:
             input_type: Type of input - "search_query" or "search_document"
             
         Returns:
-            List of floats representing the embedding vector
+            float32 array of shape (dim,) representing the embedding vector
         """
         try:
             body = json.dumps({
@@ -67,7 +98,7 @@ class QueryEmbedder:
             )
             
             # Parse response
-            response_body = json.loads(response['body'].read())
+            response_body = _loads(response['body'].read())
             
             # Debug: Log the response structure
             logger.debug(f"Response body keys: {response_body.keys()}")
@@ -108,7 +139,7 @@ class QueryEmbedder:
                 logger.error(f"Empty embeddings list")
                 raise Exception(f"Empty embeddings received")
             
-            embedding = embeddings_list[0]
+            embedding = np.asarray(embeddings_list[0], dtype=np.float32)
             
             logger.info(f"Generated embedding for query: '{query[:50]}...' (dimension: {len(embedding)})")
             return embedding
@@ -122,18 +153,28 @@ class QueryEmbedder:
             raise
     
     def embed_batch(self, queries: List[str], 
-               input_type: str = "search_query") -> List[List[float]]:
+               input_type: str = "search_query") -> np.ndarray:
         """
         Convert multiple queries to embeddings via Bedrock.
         
         Args:
-            queries: List of query strings (max 96)
+            queries: List of query strings (max 96 per request; duplicates
+                are embedded once and returned at every original position)
             input_type: Type of input
             
         Returns:
-            List of embedding vectors
+            float32 array of shape (N, dim), one row per query. Score against
+            a document matrix with ``embeddings @ doc_matrix.T``.
         """
         try:
+            # Embed each distinct text once, then scatter back to input order
+            unique_queries = list(dict.fromkeys(queries))
+            if len(unique_queries) < len(queries):
+                logger.info(f"Deduplicated batch: {len(queries)} -> {len(unique_queries)} unique queries")
+                unique_embeddings = self.embed_batch(unique_queries, input_type)
+                idx_map = {q: i for i, q in enumerate(unique_queries)}
+                return unique_embeddings[[idx_map[q] for q in queries]]
+            
             if len(queries) > 96:
                 logger.warning(f"Batch size {len(queries)} exceeds limit. Processing in chunks.")
                 return self._embed_large_batch(queries, input_type)
@@ -151,32 +192,227 @@ class QueryEmbedder:
                 body=body
             )
             
-            response_body = json.loads(response['body'].read())
+            response_body = _loads(response['body'].read())
             
-            if 'embeddings' not in response_body:
-                logger.error(f"Missing 'embeddings' key. Response: {response_body}")
-                raise Exception(f"Invalid response format")
+            logger.info(f"Generated embeddings for {len(queries)} queries")
+            return self._parse_batch_response(response_body)
+        
+        except Exception as e:
+            logger.error(f"Error generating batch embeddings via Bedrock: {str(e)}")
+            raise
+    
+    async def aembed_batch(self, queries: List[str],
+                           input_type: str = "search_query") -> np.ndarray:
+        """
+        Async counterpart of embed_batch for event-loop callers (FastAPI, async Lambda).
+        
+        Uses aioboto3 (optional dependency) so the Bedrock round-trip doesn't
+        block the loop. Batches above 96 texts are split and the chunks are
+        sent concurrently with asyncio.gather.
+        
+        Args:
+            queries: List of query strings
+            input_type: Type of input
             
-            embeddings = response_body['embeddings']
+        Returns:
+            float32 array of shape (N, dim), one row per query
+        """
+        try:
+            unique_queries = list(dict.fromkeys(queries))
+            if len(unique_queries) < len(queries):
+                unique_embeddings = await self.aembed_batch(unique_queries, input_type)
+                idx_map = {q: i for i, q in enumerate(unique_queries)}
+                return unique_embeddings[[idx_map[q] for q in queries]]
             
-            # Handle v4 format
-            if isinstance(embeddings, dict):
-                if 'float' in embeddings:
-                    embeddings_list = embeddings['float']
-                else:
-                    raise Exception(f"Unknown embeddings format. Keys: {list(embeddings.keys())}")
-            else:
-                embeddings_list = embeddings
+            if len(queries) > 96:
+                chunks = [queries[i:i + 96] for i in range(0, len(queries), 96)]
+                results = await asyncio.gather(
+                    *[self.aembed_batch(chunk, input_type) for chunk in chunks]
+                )
+                return np.vstack(results)
             
-            logger.info(f"Generated embeddings for {len(queries)} queries")
-            return embeddings_list
+            body = json.dumps({
+                "texts": queries,
+                "input_type": input_type,
+                "truncate": "END"
+            })
+            
+            client = await self._get_async_client()
+            response = await client.invoke_model(
+                modelId=self.model_id,
+                contentType="application/json",
+                accept="application/json",
+                body=body
+            )
+            response_body = _loads(await response['body'].read())
+            
+            logger.info(f"Generated embeddings for {len(queries)} queries (async)")
+            return self._parse_batch_response(response_body)
         
         except Exception as e:
-            logger.error(f"Error generating batch embeddings via Bedrock: {str(e)}")
+            logger.error(f"Error generating async batch embeddings via Bedrock: {str(e)}")
             raise
     
+    def embed_offline(self, queries: List[str], s3_bucket: str, role_arn: str,
+                      input_type: str = "search_document",
+                      s3_prefix: str = "bedrock-batch/embeddings",
+                      poll_interval: float = 30.0,
+                      timeout: float = 24 * 3600) -> np.ndarray:
+        """
+        Embed a large offline corpus through Bedrock Batch Inference.
+        
+        Batch jobs are billed at ~50% of on-demand and don't consume the
+        invoke_model TPS quota, so use this for index builds rather than
+        serving. Bedrock requires a minimum number of records per job (100 at
+        time of writing) and caps concurrent jobs per account; callers
+        submitting many jobs should queue them upstream.
+        
+        Steps:
+            1. Upload one JSONL record per query to s3://{bucket}/{prefix}/{job}/input.jsonl
+            2. CreateModelInvocationJob
+            3. Poll GetModelInvocationJob until a terminal status
+            4. Download input.jsonl.out and reassemble rows by recordId
+        
+        Args:
+            queries: Texts to embed
+            s3_bucket: Bucket for job input/output
+            role_arn: IAM service role Bedrock assumes to read/write the bucket
+            input_type: Cohere input type (default "search_document")
+            s3_prefix: Key prefix for job files
+            poll_interval: Seconds between status checks
+            timeout: Give up after this many seconds
+            
+        Returns:
+            float32 array of shape (N, dim), in input order
+        """
+        job_name = f"finrag-embed-{uuid.uuid4().hex[:12]}"
+        job_prefix = f"{s3_prefix.rstrip('/')}/{job_name}"
+        input_key = f"{job_prefix}/input.jsonl"
+        
+        records = "\n".join(
+            json.dumps({
+                "recordId": f"{i:011d}",
+                "modelInput": {"texts": [q], "input_type": input_type, "truncate": "END"},
+            })
+            for i, q in enumerate(queries)
+        )
+        
+        s3 = boto3.client('s3', region_name=self.region)
+        bedrock = boto3.client('bedrock', region_name=self.region)
+        
+        s3.put_object(Bucket=s3_bucket, Key=input_key, Body=records.encode("utf-8"))
+        logger.info(f"Uploaded {len(queries)} records to s3://{s3_bucket}/{input_key}")
+        
+        job = bedrock.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=role_arn,
+            modelId=self.model_id,
+            inputDataConfig={"s3InputDataConfig": {
+                "s3Uri": f"s3://{s3_bucket}/{input_key}",
+                "s3InputFormat": "JSONL",
+            }},
+            outputDataConfig={"s3OutputDataConfig": {
+                "s3Uri": f"s3://{s3_bucket}/{job_prefix}/output/",
+            }},
+        )
+        job_arn = job["jobArn"]
+        logger.info(f"Submitted Bedrock batch job {job_name} ({job_arn})")
+        
+        deadline = time.monotonic() + timeout
+        while True:
+            status = bedrock.get_model_invocation_job(jobIdentifier=job_arn)["status"]
+            if status in ("Completed", "PartiallyCompleted"):
+                break
+            if status in ("Failed", "Stopped", "Expired"):
+                raise Exception(f"Bedrock batch job {job_name} ended with status {status}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Bedrock batch job {job_name} still {status} after {timeout}s")
+            time.sleep(poll_interval)
+        
+        # Output lands under {output_prefix}/{job_id}/{input_file}.out
+        job_id = job_arn.rsplit("/", 1)[-1]
+        output_key = f"{job_prefix}/output/{job_id}/input.jsonl.out"
+        body = s3.get_object(Bucket=s3_bucket, Key=output_key)["Body"].read()
+        
+        rows = {}
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            record = _loads(line)
+            if "modelOutput" not in record:
+                raise Exception(f"Record {record.get('recordId')} failed: {record.get('error')}")
+            rows[int(record["recordId"])] = self._parse_batch_response(record["modelOutput"])[0]
+        
+        if len(rows) != len(queries):
+            raise Exception(f"Bedrock batch job {job_name} returned {len(rows)}/{len(queries)} records")
+        
+        logger.info(f"Bedrock batch job {job_name} embedded {len(rows)} texts")
+        return np.vstack([rows[i] for i in range(len(queries))])
+    
+    async def aembed_offline(self, *args, **kwargs) -> np.ndarray:
+        """Async wrapper around embed_offline (runs the polling loop in a worker thread)."""
+        return await asyncio.to_thread(self.embed_offline, *args, **kwargs)
+    
+    async def _get_async_client(self):
+        """
+        Return the embedder's aioboto3 Bedrock client, opening it on first use.
+        
+        Uses the same pool size / adaptive retries / timeouts as the sync client.
+        aiohttp clients belong to the event loop they were opened on, so a new
+        loop (e.g. a second asyncio.run) gets a fresh client.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_loop = loop
+            self._async_lock = asyncio.Lock()
+            self._async_client = None
+            self._async_client_cm = None
+        
+        async with self._async_lock:
+            if self._async_client is None:
+                try:
+                    import aioboto3
+                    from aiobotocore.config import AioConfig
+                except ImportError:
+                    raise ImportError(
+                        "aembed_batch requires aioboto3 (pip install aioboto3)."
+                    ) from None
+                client_cm = aioboto3.Session().client(
+                    'bedrock-runtime', config=AioConfig(**self._boto_cfg_kwargs)
+                )
+                self._async_client = await client_cm.__aenter__()
+                self._async_client_cm = client_cm
+        return self._async_client
+    
+    async def aclose(self):
+        """Close the async Bedrock client, if open. Call before the event loop ends."""
+        client_cm = self._async_client_cm
+        self._async_client = None
+        self._async_client_cm = None
+        if client_cm is not None:
+            await client_cm.__aexit__(None, None, None)
+    
+    def _parse_batch_response(self, response_body: dict) -> np.ndarray:
+        """Extract the (N, dim) embedding matrix from a v3/v4 batch response."""
+        if 'embeddings' not in response_body:
+            logger.error(f"Missing 'embeddings' key. Response: {response_body}")
+            raise Exception(f"Invalid response format")
+        
+        embeddings = response_body['embeddings']
+        
+        # Handle v4 format
+        if isinstance(embeddings, dict):
+            if 'float' in embeddings:
+                embeddings_list = embeddings['float']
+            else:
+                raise Exception(f"Unknown embeddings format. Keys: {list(embeddings.keys())}")
+        else:
+            embeddings_list = embeddings
+        
+        return np.asarray(embeddings_list, dtype=np.float32)
+    
     def _embed_large_batch(self, queries: List[str], 
-                          input_type: str) -> List[List[float]]:
+                          input_type: str) -> np.ndarray:
         """Handle batches larger than 96 texts."""
         all_embeddings = []
         chunk_size = 96
@@ -184,7 +420,7 @@ class QueryEmbedder:
         for i in range(0, len(queries), chunk_size):
             chunk = queries[i:i + chunk_size]
             embeddings = self.embed_batch(chunk, input_type)
-            all_embeddings.extend(embeddings)
+            all_embeddings.append(embeddings)
             logger.info(f"Processed chunk {i//chunk_size + 1}")
         
-        return all_embeddings
\ No newline at end of file
+        return np.vstack(all_embeddings)
\ No newline at end of file
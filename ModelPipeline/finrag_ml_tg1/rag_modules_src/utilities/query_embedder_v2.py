@@ -1,13 +1,158 @@
 
+import hashlib
 import json
 import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
-import boto3
+import numpy as np
+
+try:
+    import orjson
+    _loads = orjson.loads          # C parser; much faster on 1024-float payloads
+    _dumps = orjson.dumps          # -> bytes
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+try:
+    from pybloom_live import ScalableBloomFilter
+except ImportError:
+    ScalableBloomFilter = None
 
 logger = logging.getLogger(__name__)
 
+# Years, quarters, amounts: near-duplicate queries must agree on these exactly
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+# ------------------------------------------
+# Shared Bedrock clients
+# ------------------------------------------
+
+# boto3 clients are thread-safe; building one parses the service model and
+# opens a fresh connection pool, so embedders share one per (region, pool size).
+_CLIENT_CACHE: dict = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+def _get_bedrock_client(region: str, max_pool_connections: int):
+    key = (region, max_pool_connections)
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            # Imported lazily: boto3/botocore cost ~150ms at import, and callers
+            # that inject a boto_client (tests, notebooks) never need them.
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client(
+                "bedrock-runtime",
+                region_name=region,
+                config=Config(
+                    max_pool_connections=max_pool_connections,
+                    retries={"max_attempts": 3, "mode": "adaptive"},
+                ),
+            )
+            _CLIENT_CACHE[key] = client
+        return client
+
+
+# ------------------------------------------
+# Persistent (L2) embedding cache
+# ------------------------------------------
+
+class _DiskCache:
+    """
+    SQLite-backed embedding cache that survives process restarts.
+    Keys are sha256(model_id, input_type, query); values are raw float32 blobs.
+    Best-effort: if the file can't be opened the cache runs disabled, and
+    SQLite errors are logged and treated as misses.
+    """
+
+    # Stay under SQLite's default bound-parameter limit (999)
+    _MAX_PARAMS = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        conn = None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS emb("
+                "key BLOB PRIMARY KEY, vec BLOB NOT NULL, created_at INTEGER)"
+            )
+            conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(
+                f"[QueryEmbedderV2] Disk cache unavailable ({path}): {e}; running without L2."
+            )
+            if conn is not None:
+                conn.close()
+            return
+        self._conn = conn
+
+    @staticmethod
+    def make_key(model_id: str, input_type: str, query: str) -> bytes:
+        return hashlib.sha256(
+            f"{model_id}\x00{input_type}\x00{query}".encode("utf-8")
+        ).digest()
+
+    def get_many(self, keys: List[bytes]) -> dict:
+        """Return {key: vec_blob} for the keys present on disk."""
+        found = {}
+        try:
+            with self._lock:
+                if self._conn is None:
+                    return found
+                for start in range(0, len(keys), self._MAX_PARAMS):
+                    chunk = keys[start:start + self._MAX_PARAMS]
+                    placeholders = ",".join("?" * len(chunk))
+                    found.update(self._conn.execute(
+                        f"SELECT key, vec FROM emb WHERE key IN ({placeholders})", chunk
+                    ).fetchall())
+        except sqlite3.Error as e:
+            logger.warning(f"[QueryEmbedderV2] Disk cache read failed ({self.path}): {e}")
+        return found
+
+    def put_many(self, items: List[tuple]) -> None:
+        """Write-through (key, vec_blob) pairs."""
+        now = int(time.time())
+        try:
+            with self._lock:
+                if self._conn is None:
+                    return
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO emb(key, vec, created_at) VALUES (?, ?, ?)",
+                    [(key, blob, now) for key, blob in items],
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"[QueryEmbedderV2] Disk cache write failed ({self.path}): {e}")
+
+    def close(self) -> None:
+        """Close the SQLite connection; later reads and writes are no-ops."""
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
 
 # ------------------------------------------
 # Exceptions
@@ -33,7 +178,7 @@ class EmbeddingResponseFormatError(Exception):
 # Embedding Runtime Config
 # ------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class EmbeddingRuntimeConfig:
     provider: str             # "bedrock"
     region: str
@@ -41,6 +186,14 @@ class EmbeddingRuntimeConfig:
     dimensions: int
     input_type: str
     max_query_chars: int = 3000
+    # Near-duplicate reuse: serve a cached embedding when a new query's
+    # character 5-gram Jaccard similarity to a recent query >= threshold.
+    enable_fuzzy_cache: bool = False
+    fuzzy_cache_threshold: float = 0.97
+    fuzzy_cache_size: int = 256
+    # Remember queries that failed validate_scope and reject repeats without
+    # re-checking entities (needs pybloom_live; false-positive rate ~1e-4).
+    enable_reject_filter: bool = False
 
     @classmethod
     def from_ml_config(cls, embedding_cfg_dict: dict):
@@ -78,18 +231,85 @@ class QueryEmbedderV2:
       - guardrails
       - Bedrock invocation
       - v3/v4 Cohere response parsing
+      - in-memory LRU cache of embeddings (cache_hits / cache_misses)
+      - optional SQLite L2 cache across restarts (disk_hits; FINRAG_EMBED_CACHE_PATH)
+      - batched multi-query embedding (embed_queries)
+      - concurrent per-query embedding (embed_queries_parallel, optionally with
+        per-query outcomes)
+      - close() or use as a context manager to release the worker threads and
+        the disk cache connection
+      - raw float32 / float16 byte output for vector stores (embed_query_bytes / _fp16)
     """
 
     ## boto3 is using its default credential chain: might fail. pass a boto_client explicitly
     ## Environment variables (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_SESSION_TOKEN, etc.)
     ## ModelPipeline\finrag_ml_tg1\.aws_secrets\aws_credentials.env
 
-    def __init__(self, cfg: EmbeddingRuntimeConfig, boto_client=None):
+    # Cohere on Bedrock accepts at most 96 texts per invoke_model call
+    MAX_TEXTS_PER_REQUEST = 96
+
+    def __init__(
+        self,
+        cfg: EmbeddingRuntimeConfig,
+        boto_client=None,
+        cache_max: int = 512,
+        max_workers: int = 8,
+        disk_cache_path: Optional[str] = None,
+    ):
         self.cfg = cfg
-        self.client = boto_client or boto3.client(
-            "bedrock-runtime",
-            region_name=cfg.region
-        )
+        # Pool sized to max_workers so parallel invokes don't queue on connections;
+        # the client itself is shared with other embedders in the same region.
+        self.client = boto_client or _get_bedrock_client(cfg.region, max_workers)
+
+        # Request body is constant except for "texts": serialize the static
+        # part once and splice the JSON-encoded texts in per call.
+        static_body = json.dumps({
+            "input_type": cfg.input_type,   # e.g. "search_document" or "search_query"
+            "embedding_types": ["float"],
+            "output_dimension": cfg.dimensions,  # <<< enforce 1024-d like ingestion
+            "max_tokens": 128000,
+            "truncate": "RIGHT",
+        })
+        self._body_prefix = (static_body[:-1] + ', "texts": ').encode("utf-8")
+        self._body_suffix = b"}"
+
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # In-memory LRU: (model_id, input_type, query) -> read-only float32 row
+        self._cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._cache_max = cache_max
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Singleflight: query -> Future of the caller currently fetching it, so
+        # concurrent callers wait on that request instead of repeating it
+        self._inflight: Dict[str, Future] = {}
+        self.inflight_hits = 0
+
+        # Optional L2 on disk; off unless a path is given or set in the env
+        disk_cache_path = disk_cache_path or os.environ.get("FINRAG_EMBED_CACHE_PATH")
+        self._disk: Optional[_DiskCache] = _DiskCache(disk_cache_path) if disk_cache_path else None
+        self.disk_hits = 0
+
+        # Fuzzy tier (cfg.enable_fuzzy_cache): recent query sketches + vectors
+        self._recent_keys: List[str] = []
+        self._recent_sketches: List[frozenset] = []
+        self._recent_numbers: List[tuple] = []
+        self._recent_vecs = np.empty((0, cfg.dimensions), dtype=np.float32)
+        self.fuzzy_hits = 0
+
+        # Reject filter (cfg.enable_reject_filter): queries known to be out of scope
+        self._reject_bloom = None
+        if cfg.enable_reject_filter:
+            if ScalableBloomFilter is None:
+                raise ImportError(
+                    "enable_reject_filter=True requires pybloom_live (pip install pybloom-live)."
+                )
+            self._reject_bloom = ScalableBloomFilter(initial_capacity=1024, error_rate=1e-4)
+        self.reject_hits = 0
+
         logger.info(
             f"[QueryEmbedderV2] Initialized with model={cfg.model_id}, "
             f"region={cfg.region}, dim={cfg.dimensions}"
@@ -101,9 +321,10 @@ class QueryEmbedderV2:
 
     def validate_query(self, query: str):
         """Hard block oversized queries."""
-        if len(query) > self.cfg.max_query_chars:
+        n = len(query)
+        if n > self.cfg.max_query_chars:
             raise QueryTooLongError(
-                f"Query has {len(query)} characters; "
+                f"Query has {n} characters; "
                 f"limit is {self.cfg.max_query_chars}."
             )
 
@@ -120,58 +341,29 @@ class QueryEmbedderV2:
           - no metrics
           - no sections
           - no risk_topics
-        Works whether nested objects are dataclasses or simple dicts.
+        Works whether nested objects are dataclasses or simple dicts; the
+        result itself is read by attribute, so a plain dict counts as empty.
+        Short-circuits at the first non-empty field.
         """
-        # Companies
+        _get = self._get
         companies = getattr(entities, "companies", None)
-        has_companies = False
-        if companies is not None:
-            if isinstance(companies, dict):
-                has_companies = bool(companies.get("ciks_int") or companies.get("tickers"))
-            else:
-                has_companies = bool(
-                    getattr(companies, "ciks_int", []) or
-                    getattr(companies, "tickers", [])
-                )
-
-        # Years
-        years = getattr(entities, "years", None)
-        has_years = False
-        if years is not None:
-            if isinstance(years, dict):
-                has_years = bool(years.get("years"))
-            else:
-                has_years = bool(getattr(years, "years", []))
-
-        # Metrics
-        metrics = getattr(entities, "metrics", None)
-        has_metrics = False
-        if metrics is not None:
-            if isinstance(metrics, dict):
-                has_metrics = bool(metrics.get("metrics"))
-            else:
-                has_metrics = bool(getattr(metrics, "metrics", []))
-
-        # Sections
         sections = getattr(entities, "sections", None)
-        has_sections = False
-        if sections is not None:
-            if isinstance(sections, dict):
-                has_sections = bool(sections.get("items") or sections.get("primary"))
-            else:
-                has_sections = bool(
-                    getattr(sections, "items", []) or
-                    getattr(sections, "primary", None)
-                )
-
-        # Risk topics
-        risk_topics = getattr(entities, "risk_topics", [])
-        if isinstance(risk_topics, dict):
-            has_risks = bool(risk_topics.get("topics"))
-        else:
-            has_risks = bool(risk_topics)
+        risk_topics = getattr(entities, "risk_topics", None)
+
+        return not (
+            _get(companies, "ciks_int")
+            or _get(companies, "tickers")
+            or _get(getattr(entities, "years", None), "years")
+            or _get(getattr(entities, "metrics", None), "metrics")
+            or _get(sections, "items")
+            or _get(sections, "primary")
+            or (risk_topics.get("topics") if isinstance(risk_topics, dict) else risk_topics)
+        )
 
-        return not (has_companies or has_years or has_metrics or has_sections or has_risks)
+    @staticmethod
+    def _get(obj, key, default=None):
+        """Field access for dict or attribute-style objects (None -> default)."""
+        return obj.get(key, default) if isinstance(obj, dict) else getattr(obj, key, default)
 
 
     def validate_scope(self, query: str, entities) -> None:
@@ -179,13 +371,29 @@ class QueryEmbedderV2:
         Entities is EntityExtractionResult.
         If everything is empty AND query extremely short → block.
         Otherwise, if everything is empty → out-of-scope.
+        With cfg.enable_reject_filter, previously out-of-scope queries are
+        rejected up front.
         """
+        bloom = self._reject_bloom
+        if bloom is not None:
+            with self._cache_lock:
+                rejected = query in bloom
+                if rejected:
+                    self.reject_hits += 1
+            if rejected:
+                raise QueryOutOfScopeError(
+                    "Query does not reference any financial/SEC concepts."
+                )
+
         is_empty = self._entities_empty(entities)
 
         if len(query.strip()) < 4 and is_empty:
             raise QueryTooShortError("Query too short and no entities detected.")
 
         if is_empty:
+            if bloom is not None:
+                with self._cache_lock:
+                    bloom.add(query)
             # Semantic out-of-domain
             raise QueryOutOfScopeError(
                 "Query does not reference any financial/SEC concepts."
@@ -196,39 +404,297 @@ class QueryEmbedderV2:
     # Public: embed single query
     # --------------------------------------
 
-    def embed_query(self, query: str, entities) -> List[float]:
+    def embed_query(self, query: str, entities, return_list: bool = False) -> np.ndarray:
         """
         entities: EntityExtractionResult (already computed upstream)
+
+        Returns a float32 array of shape (dimensions,). Pass return_list=True
+        for a plain List[float] (pre-ndarray behaviour).
         """
-        self.validate_query(query)
-        self.validate_scope(query, entities)
+        embedding = self.embed_queries([query], [entities])[0]
+        return embedding.tolist() if return_list else embedding
 
-        # Invoke model
-        raw = self._invoke_bedrock_raw(query)
-        embedding = self._parse_bedrock_response(raw)
+    def embed_query_bytes(self, query: str, entities) -> bytes:
+        """
+        Same as embed_query, but returns the raw little-endian float32 buffer
+        (dimensions * 4 bytes) for writers that store vectors as blobs.
+        """
+        return self.embed_queries([query], [entities])[0].astype("<f4", copy=False).tobytes()
 
-        if len(embedding) != self.cfg.dimensions:
-            raise EmbeddingResponseFormatError(
-                f"Embedding dim mismatch. Expected {self.cfg.dimensions}, "
-                f"got {len(embedding)}."
+    def embed_query_fp16(self, query: str, entities) -> bytes:
+        """
+        Half-precision variant of embed_query_bytes (dimensions * 2 bytes).
+        Lossy: only for stores that accept float16 vectors.
+        """
+        return self.embed_queries([query], [entities])[0].astype("<f2").tobytes()
+
+    # --------------------------------------
+    # Public: embed many queries (batched)
+    # --------------------------------------
+
+    def embed_queries(self, queries: List[str], entities_list) -> np.ndarray:
+        """
+        Embed several queries with as few Bedrock round-trips as possible.
+
+        Each (query, entities) pair goes through the same guardrails as
+        embed_query. Lookups go L1 (in-memory LRU) -> L2 (disk, if enabled)
+        -> fuzzy tier (if enabled) -> a request already in flight on another
+        thread; the remaining distinct queries are sent in chunks of up to
+        MAX_TEXTS_PER_REQUEST texts and written through to L1/L2.
+        Returns a float32 array of shape (len(queries), dimensions) in input order
+        (shape (0, dimensions) for an empty list).
+        """
+        if len(queries) != len(entities_list):
+            raise ValueError(
+                f"Got {len(queries)} queries but {len(entities_list)} entity results."
+            )
+        if not queries:
+            return np.empty((0, self.cfg.dimensions), dtype=np.float32)
+
+        for query, entities in zip(queries, entities_list):
+            self.validate_query(query)
+            self.validate_scope(query, entities)
+
+        model_id, input_type = self.cfg.model_id, self.cfg.input_type
+        results: List[Optional[np.ndarray]] = [None] * len(queries)
+        pending: "OrderedDict[str, List[int]]" = OrderedDict()
+        misses: "OrderedDict[str, List[int]]" = OrderedDict()
+        waiting: Dict[str, tuple] = {}
+
+        with self._cache_lock:
+            for i, query in enumerate(queries):
+                key = (model_id, input_type, query)
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    results[i] = cached
+                    continue
+                pending.setdefault(query, []).append(i)
+
+        if pending and self._disk is not None:
+            disk_keys = {_DiskCache.make_key(model_id, input_type, q): q for q in pending}
+            for disk_key, blob in self._disk.get_many(list(disk_keys)).items():
+                vec = np.frombuffer(blob, dtype=np.float32)
+                if vec.shape[0] != self.cfg.dimensions:
+                    continue  # stale entry from a different output_dimension
+                query = disk_keys[disk_key]
+                row = self._cache_put((model_id, input_type, query), vec)  # promote to L1
+                if self.cfg.enable_fuzzy_cache:
+                    self._fuzzy_remember(query, row)
+                for i in pending.pop(query):
+                    self.disk_hits += 1
+                    results[i] = row
+
+        with self._cache_lock:
+            for query, indices in pending.items():
+                if self.cfg.enable_fuzzy_cache:
+                    near = self._fuzzy_lookup(query)
+                    if near is not None:
+                        self.fuzzy_hits += len(indices)
+                        for i in indices:
+                            results[i] = near
+                        continue
+                # Re-check L1: another caller may have finished since the first pass
+                cached = self._cache.get((model_id, input_type, query))
+                if cached is not None:
+                    self.cache_hits += len(indices)
+                    for i in indices:
+                        results[i] = cached
+                    continue
+                inflight = self._inflight.get(query)
+                if inflight is not None:
+                    self.inflight_hits += len(indices)
+                    waiting[query] = (inflight, indices)
+                    continue
+                self._inflight[query] = Future()
+                self.cache_misses += len(indices)
+                misses[query] = indices
+
+        miss_queries = list(misses)
+        try:
+            for start in range(0, len(miss_queries), self.MAX_TEXTS_PER_REQUEST):
+                chunk = miss_queries[start:start + self.MAX_TEXTS_PER_REQUEST]
+
+                # Invoke model
+                raw = self._invoke_bedrock_raw(chunk)
+                embeddings = self._parse_bedrock_response(raw)
+
+                if embeddings.shape[0] != len(chunk):
+                    raise EmbeddingResponseFormatError(
+                        f"Expected {len(chunk)} embeddings, got {embeddings.shape[0]}."
+                    )
+                if embeddings.shape[1] != self.cfg.dimensions:
+                    raise EmbeddingResponseFormatError(
+                        f"Embedding dim mismatch. Expected {self.cfg.dimensions}, "
+                        f"got {embeddings.shape[1]}."
+                    )
+
+                for query, embedding in zip(chunk, embeddings):
+                    row = self._cache_put((model_id, input_type, query), embedding)
+                    if self.cfg.enable_fuzzy_cache:
+                        self._fuzzy_remember(query, row)
+                    for i in misses[query]:
+                        results[i] = row
+                    with self._cache_lock:
+                        future = self._inflight.pop(query)
+                    future.set_result(row)
+
+                if self._disk is not None:
+                    self._disk.put_many([
+                        (_DiskCache.make_key(model_id, input_type, query), row.tobytes())
+                        for query, row in zip(chunk, embeddings)
+                    ])
+        except BaseException as e:
+            # Fail every query this call still owns so waiters don't hang
+            unresolved = [q for q in miss_queries if results[misses[q][0]] is None]
+            with self._cache_lock:
+                owned = [self._inflight.pop(q) for q in unresolved]
+            for future in owned:
+                future.set_exception(e)
+            raise
+
+        for future, indices in waiting.values():
+            row = future.result()
+            for i in indices:
+                results[i] = row
+
+        # vstack copies, so callers never hold a view into the cache
+        return np.vstack(results)
+
+    def embed_queries_parallel(
+        self, queries: List[str], entities_list, return_exceptions: bool = False
+    ) -> Union[np.ndarray, List[Union[np.ndarray, Exception]]]:
+        """
+        Embed queries concurrently, one invoke_model per query, on a shared
+        thread pool of max_workers threads.
+
+        By default returns a float32 array of shape (len(queries), dimensions)
+        in input order; if any query fails, the exception of the first failing
+        query (in input order) is raised and no results are returned.
+
+        With return_exceptions=True, each query succeeds or fails on its own:
+        returns a list in input order holding either the query's (dimensions,)
+        float32 array or the exception it raised (guardrail errors included).
+        """
+        if len(queries) != len(entities_list):
+            raise ValueError(
+                f"Got {len(queries)} queries but {len(entities_list)} entity results."
+            )
+        if not queries:
+            if return_exceptions:
+                return []
+            return np.empty((0, self.cfg.dimensions), dtype=np.float32)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix="embedder",
             )
 
-        return embedding
+        futures = [
+            self._executor.submit(self.embed_query, query, entities)
+            for query, entities in zip(queries, entities_list)
+        ]
+        if not return_exceptions:
+            return np.vstack([f.result() for f in futures])
+
+        outcomes: List[Union[np.ndarray, Exception]] = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    def close(self) -> None:
+        """
+        Shut down the embed_queries_parallel thread pool, if one was started,
+        and close the L2 disk cache connection (later calls run without L2).
+        Safe to call more than once; a later parallel call starts a new pool.
+        """
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        disk, self._disk = self._disk, None
+        if disk is not None:
+            disk.close()
+
+    def __enter__(self) -> "QueryEmbedderV2":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _cache_put(self, key: tuple, embedding: np.ndarray) -> np.ndarray:
+        """Insert a read-only copy into the LRU (evicting past cache_max); return it."""
+        row = np.array(embedding, dtype=np.float32)
+        row.setflags(write=False)
+        with self._cache_lock:
+            self._cache[key] = row
+            self._cache.move_to_end(key)
+            if len(self._cache) > self._cache_max:
+                self._cache.popitem(last=False)
+        return row
+
+    # --------------------------------------
+    # Fuzzy (near-duplicate) cache tier
+    # --------------------------------------
+
+    @staticmethod
+    def _ngram_sketch(query: str, n: int = 5) -> frozenset:
+        """Character n-gram set of the case/punctuation-normalized query."""
+        text = " ".join(re.sub(r"[^a-z0-9]+", " ", query.lower()).split())
+        if len(text) <= n:
+            return frozenset((text,))
+        return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
+
+    def _fuzzy_lookup(self, query: str) -> Optional[np.ndarray]:
+        """
+        Return the embedding of the most similar recent query above threshold. Caller holds the lock.
+        Only queries with exactly the same numbers are candidates: long queries that
+        differ just in a year ("... fiscal year 2017?" vs "2018?") clear 0.97 Jaccard.
+        """
+        if not self._recent_keys:
+            return None
+        sketch = self._ngram_sketch(query)
+        numbers = tuple(_NUMBER_RE.findall(query))
+        best_idx, best_sim = -1, 0.0
+        for idx, other in enumerate(self._recent_sketches):
+            if self._recent_numbers[idx] != numbers:
+                continue
+            sim = len(sketch & other) / len(sketch | other)
+            if sim > best_sim:
+                best_idx, best_sim = idx, sim
+        if best_sim >= self.cfg.fuzzy_cache_threshold:
+            logger.debug(
+                f"[QueryEmbedderV2] Fuzzy cache hit ({best_sim:.3f}): "
+                f"'{query[:60]}' ~ '{self._recent_keys[best_idx][:60]}'"
+            )
+            return self._recent_vecs[best_idx]
+        return None
+
+    def _fuzzy_remember(self, query: str, embedding: np.ndarray) -> None:
+        """Append to the recent-query window, evicting the oldest past fuzzy_cache_size."""
+        with self._cache_lock:
+            self._recent_keys.append(query)
+            self._recent_sketches.append(self._ngram_sketch(query))
+            self._recent_numbers.append(tuple(_NUMBER_RE.findall(query)))
+            self._recent_vecs = np.vstack([self._recent_vecs, embedding[None, :]])
+            overflow = len(self._recent_keys) - self.cfg.fuzzy_cache_size
+            if overflow > 0:
+                del self._recent_keys[:overflow]
+                del self._recent_sketches[:overflow]
+                del self._recent_numbers[:overflow]
+                self._recent_vecs = self._recent_vecs[overflow:]
 
     # --------------------------------------
     # Bedrock invocation
     # --------------------------------------
 
-    def _invoke_bedrock_raw(self, query: str) -> dict:
-        """Send a single-query embedding request to Bedrock (v4-style)."""
-        body = json.dumps({
-            "texts": [query],
-            "input_type": self.cfg.input_type,   # e.g. "search_document" or "search_query"
-            "embedding_types": ["float"],
-            "output_dimension": self.cfg.dimensions,  # <<< enforce 1024-d like ingestion
-            "max_tokens": 128000,
-            "truncate": "RIGHT",
-        })
+    def _invoke_bedrock_raw(self, queries: List[str]) -> dict:
+        """Send one embedding request for up to MAX_TEXTS_PER_REQUEST texts (v4-style)."""
+        body = self._body_prefix + _dumps(queries) + self._body_suffix
 
         try:
             resp = self.client.invoke_model(
@@ -237,7 +703,7 @@ class QueryEmbedderV2:
                 accept="application/json",
                 body=body,
             )
-            return json.loads(resp["body"].read())
+            return _loads(resp["body"].read())
         except Exception as ex:
             raise EmbeddingProviderError(f"Bedrock invoke failed: {ex}")
 
@@ -246,8 +712,9 @@ class QueryEmbedderV2:
     # Response parsing for v3/v4
     # --------------------------------------
 
-    def _parse_bedrock_response(self, body: dict) -> List[float]:
+    def _parse_bedrock_response(self, body: dict) -> np.ndarray:
         """
+        Returns a float32 array of shape (n_texts, dim).
         Handles:
           - v4: {"embeddings": {"float": [[...]]}}
           - v3: {"embeddings": [[...]]}
@@ -280,6 +747,9 @@ class QueryEmbedderV2:
                 "Embeddings list is empty or malformed."
             )
 
-        return list_2d[0]
+        try:
+            return np.asarray(list_2d, dtype=np.float32).reshape(len(list_2d), -1)
+        except (TypeError, ValueError) as ex:
+            raise EmbeddingResponseFormatError(f"Embeddings are not a numeric matrix: {ex}")
 
 
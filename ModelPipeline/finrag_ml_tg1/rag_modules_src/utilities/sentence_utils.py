@@ -15,7 +15,8 @@ def extract_sentence_position(df: pl.DataFrame, sentenceid_col: str = 'sentenceI
     Example: "0001045810_10-K_2020_section_1A_45" → pos=45
     
     Logic:
-    - Split by '_', take last segment
+    - Regex-extract the trailing '_'-delimited integer (single pass over the
+      string buffer; no intermediate List[Utf8] column from str.split)
     - Cast to int16 (strict=False allows NULL on failure)
     - Fill NULL with -1 (sentinel value for malformed IDs)
     
@@ -36,8 +37,7 @@ def extract_sentence_position(df: pl.DataFrame, sentenceid_col: str = 'sentenceI
     """
     return df.with_columns([
         pl.col(sentenceid_col)
-          .str.split('_')
-          .list.last()
+          .str.extract(r'(?:^|_)(-?\d+)$', 1)   # same segment split('_').last() would give
           .cast(pl.Int16, strict=False)  # strict=False → NULL on cast failure
           .fill_null(-1)                  # NULL → -1 sentinel
           .alias('sentence_pos')
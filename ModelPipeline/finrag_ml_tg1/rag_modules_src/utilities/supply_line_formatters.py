@@ -1,8 +1,11 @@
 # ModelPipeline/finrag_ml_tg1/rag_modules_src/utilities/supply_line_formatters.py
 
 
+import io
+import re
 from typing import Dict, Any, Optional
-from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
 
 
 """
@@ -13,7 +16,22 @@ suitable for notebook display or LLM context.
 """
 
 from typing import Dict, Any
-from collections import defaultdict
+
+
+# Statement prefixes dropped from metric IDs for display labels. Not anchored:
+# like the str.replace chain it replaces, a prefix is removed wherever it occurs.
+_METRIC_PREFIX = re.compile(r"income_stmt_|balance_sheet_|cash_flow_")
+_US_TO_SPACE = str.maketrans("_", " ")
+
+_BAR = "═" * 70
+
+# (threshold, divisor, decimals, suffix), checked largest first.
+# No trillion tier: values >= 1e12 stay in B (e.g. "$4200.0B").
+_SUFFIX_TABLE = (
+    (1_000_000_000, 1_000_000_000, 1, "B"),
+    (1_000_000, 1_000_000, 1, "M"),
+    (1_000, 1_000, 0, "K"),
+)
 
 
 def format_value_compact(value: float) -> str:
@@ -32,14 +50,11 @@ def format_value_compact(value: float) -> str:
         >>> format_value_compact(1500000)
         '$1.5M'
     """
-    if abs(value) >= 1_000_000_000:
-        return f"${value/1_000_000_000:.1f}B"
-    elif abs(value) >= 1_000_000:
-        return f"${value/1_000_000:.1f}M"
-    elif abs(value) >= 1_000:
-        return f"${value/1_000:.0f}K"
-    else:
-        return f"${value:.0f}"
+    a = abs(value)
+    for threshold, divisor, precision, suffix in _SUFFIX_TABLE:
+        if a >= threshold:
+            return f"${value / divisor:.{precision}f}{suffix}"
+    return f"${value:.0f}"
 
 def format_analytical_compact(
     raw_result: Dict[str, Any],
@@ -101,103 +116,94 @@ def format_analytical_compact(
     ent_years = entity_meta.get("years") or []
     ent_sections = entity_meta.get("sections") or []
 
-    # Metric ID → short label
+    # Metric ID → short label (memoized per call: each metric ID recurs in
+    # the header and in every ticker/year row of the body)
+    _label_cache: Dict[str, str] = {}
+
     def short_metric_name(metric_id: str) -> str:
+        label = _label_cache.get(metric_id)
+        if label is not None:
+            return label
         if not metric_id:
             return ""
-        base = (
-            metric_id.replace("income_stmt_", "")
-                     .replace("balance_sheet_", "")
-                     .replace("cash_flow_", "")
+        label = _label_cache[metric_id] = (
+            _METRIC_PREFIX.sub("", metric_id).translate(_US_TO_SPACE)
         )
-        return base.replace("_", " ")
+        return label
 
     # ------------------------------------------------------------------
-    # Group data: ticker → year → {metric_id: value}
+    # Flatten to (ticker, year, metric_id, value) rows, sorted once by
+    # (ticker, year); the stable sort keeps source order within a group
     # ------------------------------------------------------------------
-    grouped = defaultdict(lambda: defaultdict(dict))
-
-    for item in data:
-        if not item.get("found"):
-            continue
-        ticker = item.get("ticker")
-        year = item.get("year")
-        metric_id = item.get("metric")
-        value = item.get("value")
-
-        if ticker is None or year is None or metric_id is None or value is None:
-            continue
-
-        grouped[ticker][year][metric_id] = value
+    rows = [
+        (item.get("ticker"), item.get("year"), item.get("metric"), item.get("value"))
+        for item in data
+        if item.get("found")
+    ]
+    rows = [r for r in rows if None not in r]
 
-    if not grouped:
+    if not rows:
         return ""
 
+    rows.sort(key=itemgetter(0, 1))
+
     # ------------------------------------------------------------------
     # Build header -- KPI block header
+    # (one template; optional segments are precomputed, "" when absent)
     # ------------------------------------------------------------------
-    header_lines = [
-        "══════════════════════════════════════════════════════════════════════",
-        "KPI SNAPSHOT - METRIC PIPELINE OUTPUT",
-        "══════════════════════════════════════════════════════════════════════",
-        "",
-    ]
 
     # # QUERY AT TOP LOGIC REMOVED HERE.
     # # Place the source query BEFORE the KPI header
     # query_text = raw_result.get("query")
-    # if query_text:
-    #     header_lines.append(f"Source query: {query_text}")
-    #     header_lines.append("")
+    # query_block = f"Source query: {query_text}\n\n" if query_text else ""
 
-    header_lines.append("Scope:")
     # Entity-side view (optional)
-    if ent_companies or ent_years or ent_sections:
-        if ent_companies:
-            header_lines.append(
-                "  Companies (entities): " + ", ".join(ent_companies)
-            )
-        if ent_years:
-            header_lines.append(
-                "  Years (entities):     " + ", ".join(str(y) for y in ent_years)
-            )
-        if ent_sections:
-            header_lines.append(
-                "  Sections (entities):  " + ", ".join(ent_sections)
-            )
+    ent_block = ""
+    if ent_companies:
+        ent_block += "  Companies (entities): " + ", ".join(ent_companies) + "\n"
+    if ent_years:
+        ent_block += "  Years (entities):     " + ", ".join(str(y) for y in ent_years) + "\n"
+    if ent_sections:
+        ent_block += "  Sections (entities):  " + ", ".join(ent_sections) + "\n"
 
     # Metric filter view (always shown)
-    header_lines.append(
-        "  Companies (metrics):  " + (", ".join(tickers) or "(none)")
-    )
-    header_lines.append(
-        "  Years (metrics):      " + (", ".join(str(y) for y in years) or "(none)")
-    )
-    header_lines.append(
-        "  Metrics:              "
-        + (", ".join(short_metric_name(m) for m in metric_ids) or "(none)")
-    )
+    tickers_str = ", ".join(tickers) or "(none)"
+    years_str = ", ".join(str(y) for y in years) or "(none)"
+    metrics_str = ", ".join(short_metric_name(m) for m in metric_ids) or "(none)"
 
+    coverage_line = ""
     if combos_found is not None and combos_total is not None:
-        header_lines.append(
-            f"  Coverage:             {combos_found}/{combos_total} metric combinations with values"
+        coverage_line = (
+            f"  Coverage:             {combos_found}/{combos_total} metric combinations with values\n"
         )
 
-    header_lines.append("")
-    header_lines.append("DETAILS BY COMPANY AND YEAR")
-    header_lines.append("")
+    buf = io.StringIO()
+    write = buf.write
+    write(
+        f"{_BAR}\n"
+        "KPI SNAPSHOT - METRIC PIPELINE OUTPUT\n"
+        f"{_BAR}\n"
+        "\n"
+        "Scope:\n"
+        f"{ent_block}"
+        f"  Companies (metrics):  {tickers_str}\n"
+        f"  Years (metrics):      {years_str}\n"
+        f"  Metrics:              {metrics_str}\n"
+        f"{coverage_line}"
+        "\n"
+        "DETAILS BY COMPANY AND YEAR\n"
+        "\n"
+    )
 
     # ------------------------------------------------------------------
     # Build body
     # ------------------------------------------------------------------
-    body_lines = []
-
-    for ticker in sorted(grouped.keys()):
-        body_lines.append(f"{ticker}:")
-        years_for_t = sorted(grouped[ticker].keys())
+    for ticker, ticker_rows in groupby(rows, key=itemgetter(0)):
+        write(f"{ticker}:\n")
 
-        for year in years_for_t:
-            metric_map = grouped[ticker][year]
+        for year, year_rows in groupby(ticker_rows, key=itemgetter(1)):
+            # Later duplicates overwrite earlier ones, as before
+            metric_map = {m_id: value for _, _, m_id, value in year_rows}
 
             # Order metrics according to filter order, then any extras
             ordered_metric_ids = list(metric_ids)
@@ -214,11 +220,13 @@ def format_analytical_compact(
                 parts.append(f"{label}={value_str}")
 
             if parts:
-                body_lines.append(f"  {year}: " + ", ".join(parts))
+                write(f"  {year}: " + ", ".join(parts) + "\n")
 
-        body_lines.append("")  # blank line between companies
+        write("\n")  # blank line between companies
 
-    return "\n".join(header_lines + body_lines)
+    # Every line was newline-terminated; drop the final one so the output
+    # matches the previous "\n".join(lines) form exactly.
+    return buf.getvalue()[:-1]
 
 
 
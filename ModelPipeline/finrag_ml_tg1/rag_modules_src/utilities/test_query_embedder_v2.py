@@ -0,0 +1,167 @@
+# finrag_ml_tg1/rag_modules_src/utilities/test_query_embedder_v2.py
+"""
+Quick tests for query_embedder_v2.py (no AWS: a fake Bedrock client is injected)
+"""
+
+import io
+import json
+from types import SimpleNamespace
+
+import numpy as np
+
+from finrag_ml_tg1.rag_modules_src.utilities.query_embedder_v2 import (
+    EmbeddingProviderError,
+    EmbeddingRuntimeConfig,
+    QueryEmbedderV2,
+)
+
+DIM = 4
+
+# Entities with one ticker, so every query passes validate_scope
+ENTITIES = SimpleNamespace(
+    companies={"tickers": ["NVDA"]}, years=None, metrics=None, sections=None, risk_topics=[]
+)
+
+
+class FakeBedrockClient:
+    """
+    Stands in for boto3's bedrock-runtime client; embeds each text as
+    [len(text)] * DIM and fails any request containing a text in fail_on.
+    """
+
+    def __init__(self, fail_on=()):
+        self.calls = []
+        self.fail_on = set(fail_on)
+
+    def invoke_model(self, **kwargs):
+        texts = json.loads(kwargs["body"])["texts"]
+        self.calls.append(texts)
+        if self.fail_on.intersection(texts):
+            raise RuntimeError("throttled")
+        embeddings = [[float(len(t))] * DIM for t in texts]
+        return {"body": io.BytesIO(json.dumps({"embeddings": {"float": embeddings}}).encode())}
+
+
+def _make_embedder(fail_on=()):
+    cfg = EmbeddingRuntimeConfig(
+        provider="bedrock",
+        region="us-east-1",
+        model_id="cohere.embed-v4:0",
+        dimensions=DIM,
+        input_type="search_query",
+    )
+    client = FakeBedrockClient(fail_on)
+    return QueryEmbedderV2(cfg, boto_client=client), client
+
+
+def test_embed_queries_empty():
+    """Test that an empty batch returns a (0, dim) array without calling Bedrock."""
+    print("\n=== Testing Empty Batch ===")
+    embedder, client = _make_embedder()
+
+    result = embedder.embed_queries([], [])
+
+    assert result.shape == (0, DIM)
+    assert result.dtype == np.float32
+    assert client.calls == []
+    print(f"✅ Empty batch -> shape {result.shape}, no Bedrock calls")
+    return True
+
+
+def test_parallel_empty():
+    """Test that embed_queries_parallel accepts an empty batch."""
+    print("\n=== Testing Parallel Empty Batch ===")
+    embedder, client = _make_embedder()
+
+    with embedder:
+        result = embedder.embed_queries_parallel([], [])
+        outcomes = embedder.embed_queries_parallel([], [], return_exceptions=True)
+
+    assert result.shape == (0, DIM)
+    assert outcomes == []
+    assert client.calls == []
+    print("✅ Empty parallel batch -> (0, dim) array / empty outcome list")
+    return True
+
+
+def test_parallel_one_failure():
+    """Test that one failing query doesn't discard the others with return_exceptions=True."""
+    print("\n=== Testing Parallel Partial Failure ===")
+    queries = ["nvidia revenue", "nvidia net income", "nvidia total assets"]
+    embedder, client = _make_embedder(fail_on={"nvidia net income"})
+
+    with embedder:
+        outcomes = embedder.embed_queries_parallel(
+            queries, [ENTITIES] * len(queries), return_exceptions=True
+        )
+        try:
+            embedder.embed_queries_parallel(queries, [ENTITIES] * len(queries))
+            raised = False
+        except EmbeddingProviderError:
+            raised = True
+
+    assert len(outcomes) == 3
+    assert isinstance(outcomes[1], EmbeddingProviderError)
+    for i in (0, 2):
+        assert outcomes[i].dtype == np.float32
+        assert outcomes[i].tolist() == [float(len(queries[i]))] * DIM
+    assert raised
+    print(f"✅ 2 of 3 queries embedded, failure reported as {type(outcomes[1]).__name__}")
+    return True
+
+
+def test_entities_empty():
+    """Test _entities_empty on attribute-style results with dataclass or dict fields."""
+    print("\n=== Testing Entity Emptiness ===")
+    embedder, _ = _make_embedder()
+    empty = SimpleNamespace(
+        companies={"ciks_int": [], "tickers": []},
+        years=SimpleNamespace(years=[]),
+        metrics={"metrics": []},
+        sections=SimpleNamespace(items=[], primary=None),
+        risk_topics={"topics": []},
+    )
+    with_year = SimpleNamespace(
+        companies=None, years=SimpleNamespace(years=[2021]), metrics=None, sections=None, risk_topics=[]
+    )
+    with_section = SimpleNamespace(
+        companies=None, years=None, metrics=None, sections={"items": [], "primary": "ITEM_7"}, risk_topics=[]
+    )
+
+    assert embedder._entities_empty(empty)
+    assert not embedder._entities_empty(ENTITIES)
+    assert not embedder._entities_empty(with_year)
+    assert not embedder._entities_empty(with_section)
+    # The result object is read by attribute: a top-level dict is empty, as before
+    assert embedder._entities_empty({"companies": {"tickers": ["NVDA"]}})
+    print("✅ Empty/non-empty entity results classified as before")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("QueryEmbedderV2 Tests")
+    print("=" * 60)
+
+    results = {
+        "Empty Batch": test_embed_queries_empty(),
+        "Parallel Empty Batch": test_parallel_empty(),
+        "Parallel Partial Failure": test_parallel_one_failure(),
+        "Entity Emptiness": test_entities_empty(),
+    }
+
+    print("\n" + "=" * 60)
+    print("Test Summary")
+    print("=" * 60)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status} - {test_name}")
+
+
+
+"""
+
+cd ModelPipeline
+python -m finrag_ml_tg1.rag_modules_src.utilities.test_query_embedder_v2
+
+"""
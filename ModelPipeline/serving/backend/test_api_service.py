@@ -13,8 +13,14 @@ Usage:
     python -m backend.test_api_service
 """
 
-import requests
+import asyncio
+import hashlib
+import io
+import os
+import httpx
 import json
+from pathlib import Path
+from types import SimpleNamespace
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
@@ -24,114 +30,103 @@ console = Console()
 # Configuration
 BASE_URL = "http://localhost:8000"
 TIMEOUT = 60  # seconds (orchestrator can be slow)
+QUICK = bool(os.environ.get("FINRAG_TEST_QUICK"))  # one-line results, no tables
 
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]"); without it
+# the client stays on pooled HTTP/1.1 keep-alive connections.
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
 
-def test_health():
-    """Test health check endpoint."""
-    console.print("\n[bold cyan]Test 1: Health Check[/bold cyan]")
-    
+# orjson parses straight from the response bytes and is several times faster
+# than the stdlib on the larger /query payload; fall back to json without it.
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+def _json(response):
+    return _loads(response.content)
+
+# Successful /query responses are cached on disk so re-runs skip the 30-40s
+# orchestrator call. Set FINRAG_TEST_REFRESH=1 to force a real request.
+# A cached answer is only used once a live /health check passes, and is
+# reported as CACHED rather than PASS since /query itself wasn't exercised.
+QUERY_CACHE = Path(".test_cache/query.json")
+CACHED = "cached"
+
+
+def _load_query_cache():
+    if os.environ.get("FINRAG_TEST_REFRESH"):
+        return {}
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            console.print(f"✅ Status: {response.status_code}")
-            console.print(f"✅ Server status: {data['status']}")
-            console.print(f"✅ Model root exists: {data['model_root_exists']}")
-            console.print(f"✅ AWS configured: {data['aws_configured']}")
-            return True
-        else:
-            console.print(f"❌ Status: {response.status_code}")
-            return False
-            
-    except requests.exceptions.ConnectionError:
-        console.print("❌ Cannot connect to server. Is it running?")
-        console.print(f"   Start server: uvicorn backend.api_service:app --reload")
-        return False
-    except Exception as e:
-        console.print(f"❌ Error: {e}")
-        return False
+        return json.loads(QUERY_CACHE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
 
 
-def test_root():
-    """Test root endpoint."""
-    console.print("\n[bold cyan]Test 2: Root Endpoint[/bold cyan]")
+def _save_query_cache(cache):
+    QUERY_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    QUERY_CACHE.write_text(json.dumps(cache), encoding="utf-8")
+
+
+async def _check_health(client, out=console):
+    """Test health check endpoint."""
+    out.print("\n[bold cyan]Test 1: Health Check[/bold cyan]")
     
     try:
-        response = requests.get(f"{BASE_URL}/", timeout=5)
+        response = await client.get("/health", timeout=5)
         
         if response.status_code == 200:
-            data = response.json()
-            console.print(f"✅ Status: {response.status_code}")
-            console.print(f"✅ Service: {data['service']}")
-            console.print(f"✅ Version: {data['version']}")
+            data = _json(response)
+            out.print(f"✅ Status: {response.status_code}")
+            out.print(f"✅ Server status: {data['status']}")
+            out.print(f"✅ Model root exists: {data['model_root_exists']}")
+            out.print(f"✅ AWS configured: {data['aws_configured']}")
             return True
         else:
-            console.print(f"❌ Status: {response.status_code}")
+            out.print(f"❌ Status: {response.status_code}")
             return False
             
+    except httpx.ConnectError:
+        out.print("❌ Cannot connect to server. Is it running?")
+        out.print(f"   Start server: uvicorn backend.api_service:app --reload")
+        return False
     except Exception as e:
-        console.print(f"❌ Error: {e}")
+        out.print(f"❌ Error: {e}")
         return False
 
 
-def test_query_valid():
-    """Test query endpoint with valid request."""
-    console.print("\n[bold cyan]Test 3: Valid Query[/bold cyan]")
-    console.print("[yellow]⏳ This may take 30-40 seconds...[/yellow]")
-    
-    payload = {
-        "question": "What was Apple's revenue in 2023?",
-        "include_kpi": True,
-        "include_rag": True,
-        "model_key": None
-    }
+async def _check_root(client, out=console):
+    """Test root endpoint."""
+    out.print("\n[bold cyan]Test 2: Root Endpoint[/bold cyan]")
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/query",
-            json=payload,
-            timeout=TIMEOUT
-        )
+        response = await client.get("/", timeout=5)
         
         if response.status_code == 200:
-            data = response.json()
-            
-            # Create results table
-            table = Table(title="Query Results", show_header=True)
-            table.add_column("Field", style="cyan")
-            table.add_column("Value", style="green")
-            
-            table.add_row("Status", str(response.status_code))
-            table.add_row("Query", data['query'][:50] + "...")
-            table.add_row("Answer", data['answer'][:100] + "...")
-            table.add_row("Model", data['metadata']['llm']['model_id'])
-            table.add_row("Tokens", str(data['metadata']['llm']['total_tokens']))
-            table.add_row("Cost", f"${data['metadata']['llm']['cost']:.4f}")
-            table.add_row("Time", f"{data['metadata'].get('processing_time_ms', 0):.0f}ms")
-            
-            console.print(table)
+            data = _json(response)
+            out.print(f"✅ Status: {response.status_code}")
+            out.print(f"✅ Service: {data['service']}")
+            out.print(f"✅ Version: {data['version']}")
             return True
-            
         else:
-            console.print(f"❌ Status: {response.status_code}")
-            console.print(f"   Response: {response.text[:200]}")
+            out.print(f"❌ Status: {response.status_code}")
             return False
             
-    except requests.exceptions.Timeout:
-        console.print(f"❌ Request timed out after {TIMEOUT} seconds")
-        console.print("   Orchestrator may be taking longer than expected")
-        return False
     except Exception as e:
-        console.print(f"❌ Error: {e}")
+        out.print(f"❌ Error: {e}")
         return False
 
 
-
-def test_query_valid():
+async def _check_query_valid(client, out=console):
     """Test query endpoint with valid request."""
-    console.print("\n[bold cyan]Test 3: Valid Query[/bold cyan]")
-    console.print("[yellow]⏳ This may take 30-40 seconds...[/yellow]")
+    out.print("\n[bold cyan]Test 3: Valid Query[/bold cyan]")
+    out.print("[yellow]⏳ This may take 30-40 seconds...[/yellow]")
     
     # Use 2017 data (more likely to exist in your dataset)
     # Simple, focused query about specific metrics
@@ -144,19 +139,37 @@ def test_query_valid():
         "model_key": None
     }
     
-    console.print(f"[dim]Query: {query}[/dim]\n")
+    out.print(f"[dim]Query: {query}[/dim]\n")
+    
+    cache = _load_query_cache()
+    key = hashlib.sha1(
+        json.dumps([BASE_URL, payload], sort_keys=True).encode("utf-8")
+    ).hexdigest()
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/query",
-            json=payload,
-            timeout=TIMEOUT
-        )
+        cached = key in cache
+        if cached:
+            health = await client.get("/health", timeout=5)
+            if health.status_code != 200:
+                out.print(f"❌ Server unhealthy ({health.status_code}); not using cached response")
+                return False
+            out.print(f"[dim]Using cached response from {QUERY_CACHE} (FINRAG_TEST_REFRESH=1 to re-query)[/dim]")
+            response = SimpleNamespace(status_code=200)
+            data = cache[key]
+        else:
+            response = await client.post(
+                "/query",
+                json=payload,
+                timeout=TIMEOUT
+            )
+            data = _json(response)
+            if response.status_code == 200:
+                cache[key] = data
+                _save_query_cache(cache)
         
         # Check if we got an error response
         if response.status_code != 200:
-            data = response.json()
-            console.print(f"[red]❌ Status: {response.status_code}[/red]")
+            out.print(f"[red]❌ Status: {response.status_code}[/red]")
             
             # Check if it's a data/setup error vs actual API error
             if "error" in data:
@@ -164,18 +177,24 @@ def test_query_valid():
                 
                 # Check for common data setup issues
                 if "not found" in error_msg.lower() or "does not exist" in error_msg.lower():
-                    console.print("[yellow]⚠️  Data Setup Issue Detected[/yellow]")
-                    console.print(f"   Error: {error_msg[:200]}")
-                    console.print("\n[dim]This is expected if your ML pipeline data isn't fully set up.[/dim]")
-                    console.print("[dim]The API is working correctly - it's reporting the data issue.[/dim]")
+                    out.print("[yellow]⚠️  Data Setup Issue Detected[/yellow]")
+                    out.print(f"   Error: {error_msg[:200]}")
+                    out.print("\n[dim]This is expected if your ML pipeline data isn't fully set up.[/dim]")
+                    out.print("[dim]The API is working correctly - it's reporting the data issue.[/dim]")
                     return True  # Count as pass - API works, just needs data
                 else:
-                    console.print(f"   Error: {error_msg[:200]}")
+                    out.print(f"   Error: {error_msg[:200]}")
                     return False
             return False
         
         # Success - show results
-        data = response.json()
+        if QUICK:
+            llm = data['metadata']['llm']
+            out.print(
+                f"✅ {response.status_code} {llm['model_id']} ${llm['cost']:.4f} "
+                f"{data['metadata'].get('processing_time_ms') or 0:.0f}ms"
+            )
+            return CACHED if cached else True
         
         # Create results table
         table = Table(title="Query Results", show_header=True)
@@ -200,24 +219,56 @@ def test_query_valid():
         table.add_row("RAG Included", str(ctx['rag_included']))
         table.add_row("Context Length", str(ctx['context_length']))
         
-        console.print(table)
+        out.print(table)
         
         # Show sample of answer
-        console.print("\n[bold cyan]Sample Answer:[/bold cyan]")
-        console.print(data['answer'][:300] + "..." if len(data['answer']) > 300 else data['answer'])
+        out.print("\n[bold cyan]Sample Answer:[/bold cyan]")
+        out.print(data['answer'][:300] + "..." if len(data['answer']) > 300 else data['answer'])
         
-        return True
+        return CACHED if cached else True
         
-    except requests.exceptions.Timeout:
-        console.print(f"❌ Request timed out after {TIMEOUT} seconds")
-        console.print("   Orchestrator may be taking longer than expected")
+    except httpx.TimeoutException:
+        out.print(f"❌ Request timed out after {TIMEOUT} seconds")
+        out.print("   Orchestrator may be taking longer than expected")
         return False
     except Exception as e:
-        console.print(f"❌ Error: {e}")
+        out.print(f"❌ Error: {e}")
         return False
     
 
 
+def _buffer_console():
+    """Off-screen Console that renders like the main one (colors, width)."""
+    # console.capture() is not an option here: it redirects the one shared
+    # console, so concurrently running tests would land in each other's capture.
+    return Console(
+        file=io.StringIO(),
+        force_terminal=console.is_terminal,
+        color_system=console.color_system,
+        width=console.width,
+    )
+
+
+async def _run_tests(tests, buffers):
+    """Run the async tests over one shared client; return {name: passed}."""
+    results = {}
+    # retries= only re-attempts failed connects, so a slow /query is never re-run
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        timeout=TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(http2=HTTP2, retries=2),
+    ) as client:
+        tasks = {
+            name: asyncio.create_task(test(client, buffers[name]))
+            for name, test in tests.items()
+        }
+        for name, task in tasks.items():
+            results[name] = await task
+            console.file.write(buffers[name].file.getvalue())
+            console.file.flush()
+    return results
+
+
 def run_all_tests():
     """Run all tests and display summary."""
     console.print(Panel.fit(
@@ -225,37 +276,49 @@ def run_all_tests():
         border_style="blue"
     ))
     
-    results = {
-        "Health Check": test_health(),
-        "Root Endpoint": test_root(),
-        "Valid Query": test_query_valid(),
-        "Invalid Query": test_query_invalid()
+    tests = {
+        "Health Check": _check_health,
+        "Root Endpoint": _check_root,
+        "Valid Query": _check_query_valid,
+        "Invalid Query": _check_query_invalid,
     }
     
+    # Tests are independent, so run them concurrently: wall time is roughly the
+    # slow query test alone. Each test prints into its own buffer, which is
+    # flushed in test order so the output never interleaves.
+    buffers = {name: _buffer_console() for name in tests}
+    results = asyncio.run(_run_tests(tests, buffers))
+    
     # Summary
     console.print("\n" + "=" * 60)
     console.print("[bold]Test Summary[/bold]")
     console.print("=" * 60)
     
     for test_name, passed in results.items():
-        status = "✅ PASS" if passed else "❌ FAIL"
+        if passed == CACHED:
+            status = "⚠️  CACHED"
+        else:
+            status = "✅ PASS" if passed else "❌ FAIL"
         console.print(f"{status} - {test_name}")
     
     total = len(results)
-    passed = sum(results.values())
+    passed = sum(r is True for r in results.values())
+    cached = sum(r == CACHED for r in results.values())
     
     console.print("=" * 60)
     console.print(f"[bold]Total: {passed}/{total} tests passed[/bold]")
+    if cached:
+        console.print(f"[yellow]{cached} served from cache (FINRAG_TEST_REFRESH=1 to re-query)[/yellow]")
     
-    if passed == total:
+    if passed + cached == total:
         console.print("[bold green] All tests passed![/bold green]")
     else:
         console.print("[bold red]  Some tests failed[/bold red]")
 
 
-def test_query_invalid():
+async def _check_query_invalid(client, out=console):
     """Test query endpoint with invalid request (too short)."""
-    console.print("\n[bold cyan]Test 4: Invalid Query (Validation)[/bold cyan]")
+    out.print("\n[bold cyan]Test 4: Invalid Query (Validation)[/bold cyan]")
     
     payload = {
         "question": "Short",  # Less than 10 chars (should fail validation)
@@ -264,24 +327,24 @@ def test_query_invalid():
     }
     
     try:
-        response = requests.post(
-            f"{BASE_URL}/query",
+        response = await client.post(
+            "/query",
             json=payload,
             timeout=5
         )
         
         # Should return 422 (validation error)
         if response.status_code == 422:
-            console.print(f"✅ Status: {response.status_code} (validation correctly rejected)")
-            error = response.json()
-            console.print(f"✅ Error type: {error['detail'][0]['type']}")
+            out.print(f"✅ Status: {response.status_code} (validation correctly rejected)")
+            error = _json(response)
+            out.print(f"✅ Error type: {error['detail'][0]['type']}")
             return True
         else:
-            console.print(f"❌ Expected 422, got: {response.status_code}")
+            out.print(f"❌ Expected 422, got: {response.status_code}")
             return False
             
     except Exception as e:
-        console.print(f"❌ Error: {e}")
+        out.print(f"❌ Error: {e}")
         return False
     
 
@@ -81,4 +81,15 @@ METRIC_KEYWORDS = [
 QUANTITATIVE_INDICATORS = [
     'how much', 'how many', 'what is', 'what was',
     'what were', 'total', 'amount', 'value', 'number'
-]
\ No newline at end of file
+]
+
+# Freeze the lookup maps (read-only views) and precompute the key orderings
+# the extractor needs, once at import instead of per FilterExtractor
+from types import MappingProxyType
+
+COMPANY_TO_TICKER = MappingProxyType(COMPANY_TO_TICKER)
+METRIC_MAPPINGS = MappingProxyType(METRIC_MAPPINGS)
+
+COMPANY_KEYS = tuple(COMPANY_TO_TICKER)
+METRIC_KEYS = tuple(METRIC_MAPPINGS)
+METRIC_KEYS_BY_LEN = tuple(sorted(METRIC_MAPPINGS, key=len, reverse=True))
@@ -3,48 +3,104 @@ Extract structured filters (ticker, year, metric) from natural language queries
 """
 
 import re
+from functools import lru_cache
 from typing import Optional, Dict, List
-from config.metric_mappings import COMPANY_TO_TICKER, METRIC_MAPPINGS
+from config.metric_mappings import (
+    COMPANY_TO_TICKER, METRIC_MAPPINGS, COMPANY_KEYS, METRIC_KEYS, METRIC_KEYS_BY_LEN
+)
+
+try:
+    # C++ Levenshtein; the pure-Python matcher below is the fallback
+    from rapidfuzz import process as _rf_process
+    from rapidfuzz.distance import Levenshtein as _rf_levenshtein
+except ImportError:
+    _rf_process = None
+
+
+# Compiled once at import instead of going through re's cache on every query
+_TICKER_RE = re.compile(r'\b([A-Za-z]{2,5})\b')
+_YEAR_RE = re.compile(r'\b((?:19|20)\d{2})\b')
+# Word tokens with the same boundaries as \b...\b keyword matching
+_WORD_RE = re.compile(r'\w+')
+
+# Uppercased words that look like tickers but aren't
+_COMMON_WORDS = frozenset({'IN', 'IT', 'IS', 'AS', 'AT', 'TO', 'OR', 'AND', 'THE', 'WHAT', 'WAS', 'ARE', 'FOR'})
+
+# Words never fuzzy-matched against metric keywords / company names
+_STOP_EXTRACT = frozenset({'the', 'and', 'what', 'how', 'was', 'is', 'are', 'were', 'from', 'with'})
+_STOP_TICKER = frozenset({'the', 'and', 'what', 'how', 'was', 'is', 'are'})
+
+
+@lru_cache(maxsize=8192)
+def levenshtein_distance(s1: str, s2: str) -> int:
+    """
+    Calculate edit distance between two strings
+    Memoized: the same (word, keyword) pairs recur across queries
+    """
+    if len(s1) < len(s2):
+        return levenshtein_distance(s2, s1)
+    if len(s2) == 0:
+        return len(s1)
+    
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+    
+    return previous_row[-1]
 
 
 def simple_fuzzy_match(word: str, choices: list, threshold: float = 0.8) -> tuple:
     """
-    Simple fuzzy matching using Levenshtein distance (no external libs needed)
+    Simple fuzzy matching using Levenshtein distance
+    Uses rapidfuzz when installed (same 1 - distance/max_len score), else pure Python
     Returns: (best_match, similarity_score)
     """
-    def levenshtein_distance(s1: str, s2: str) -> int:
-        """Calculate edit distance between two strings"""
-        if len(s1) < len(s2):
-            return levenshtein_distance(s2, s1)
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
-    
-    def similarity(s1: str, s2: str) -> float:
-        """Calculate similarity ratio (0-1)"""
-        distance = levenshtein_distance(s1.lower(), s2.lower())
-        max_len = max(len(s1), len(s2))
-        return 1 - (distance / max_len) if max_len > 0 else 0
+    if _rf_process is not None:
+        # No score_cutoff: rapidfuzz turns it into an integer distance bound in
+        # floating point and drops exact boundary scores (1 - 1/5 vs 0.8), so the
+        # threshold is applied to the recomputed exact score instead
+        match = _rf_process.extractOne(
+            word,
+            choices,
+            scorer=_rf_levenshtein.normalized_similarity,
+            processor=str.lower,
+        )
+        if match is None:
+            return (None, 0)
+        best_match = match[0]
+        max_len = max(len(word), len(best_match))
+        if max_len == 0:
+            return (None, 0)
+        best_score = 1 - _rf_levenshtein.distance(word.lower(), best_match.lower()) / max_len
+        return (best_match, best_score * 100) if best_score >= threshold else (None, 0)
     
+    word_lower = word.lower()
     best_match = None
     best_score = 0
     
+    # The length gap is a lower bound on the edit distance, so a choice
+    # outside [len*threshold, len/threshold] can never reach the threshold
+    min_needed = int(len(word) * threshold)
+    max_needed = int(len(word) / threshold) + 1
+    
     for choice in choices:
-        score = similarity(word, choice)
+        if not (min_needed <= len(choice) <= max_needed):
+            continue
+        max_len = max(len(word), len(choice))
+        if max_len == 0:
+            continue
+        score = 1 - levenshtein_distance(word_lower, choice.lower()) / max_len
         if score > best_score:
             best_score = score
             best_match = choice
+            if best_score == 1.0:
+                break
     
     if best_score >= threshold:
         return (best_match, best_score * 100)
@@ -57,6 +113,25 @@ class FilterExtractor:
     def __init__(self):
         self.company_map = COMPANY_TO_TICKER
         self.metric_map = METRIC_MAPPINGS
+        self._company_keys = COMPANY_KEYS
+        self._metric_keys = METRIC_KEYS
+        
+        # Keyword index split by shape: single-word keywords are hash lookups on
+        # query tokens; multi-word phrases keep one precompiled pattern each,
+        # longest first, so a longer phrase claims its span before any shorter
+        # phrase overlapping it (a single alternation would let whichever
+        # phrase starts first win instead)
+        self._sorted_keys = METRIC_KEYS_BY_LEN
+        self._key_rank = {k: rank for rank, k in enumerate(self._sorted_keys)}
+        self._single = {k: v for k, v in self.metric_map.items() if ' ' not in k}
+        self._phrases = [
+            (k, re.compile(r'\b' + re.escape(k) + r'\b'))
+            for k in self._sorted_keys if ' ' in k
+        ]
+        
+        # First letters of every metric keyword: a query with no word starting
+        # with one of these skips the metric fuzzy loop
+        self._metric_initials = frozenset(k[0] for k in self.metric_map)
     
     def extract(self, query: str) -> Dict[str, any]:
         """
@@ -68,10 +143,14 @@ class FilterExtractor:
         Returns:
             Dictionary with ticker, year, metrics (list), and confidence
         """
+        # Lower/split once; both the ticker and metric passes need them
+        query_lower = query.lower()
+        words = query_lower.split()
+        
         filters = {
-            'ticker': self._extract_ticker(query),
+            'ticker': self._extract_ticker(query, query_lower, words),
             'year': self._extract_year(query),
-            'metrics': self._extract_metrics(query),
+            'metrics': self._extract_metrics(query, query_lower, words),
             'query': query
         }
         
@@ -85,7 +164,8 @@ class FilterExtractor:
         
         return filters
     
-    def _extract_ticker(self, query: str) -> Optional[str]:
+    def _extract_ticker(self, query: str, query_lower: Optional[str] = None,
+                        words: Optional[List[str]] = None) -> Optional[str]:
         """
         Extract ticker symbol or map company name to ticker with FUZZY MATCHING
         Handles both uppercase and lowercase tickers
@@ -97,24 +177,20 @@ class FilterExtractor:
             "nvida revenue" -> "NVDA" (typo correction!)
         """
         # First, try to find explicit ticker (2-5 letters, case-insensitive)
-        ticker_pattern = r'\b([A-Za-z]{2,5})\b'
-        
         # Find all potential ticker matches
-        for match in re.finditer(ticker_pattern, query):
+        for match in _TICKER_RE.finditer(query):
             potential_ticker = match.group(1).upper()  # Convert to uppercase
             
-            # Filter out common words
-            common_words = {'IN', 'IT', 'IS', 'AS', 'AT', 'TO', 'OR', 'AND', 'THE', 'WHAT', 'WAS', 'ARE', 'FOR'}
-            
             # Check if it looks like a ticker (not a common word)
-            if potential_ticker not in common_words:
+            if potential_ticker not in _COMMON_WORDS:
                 # Additional validation: if it's all uppercase in original query, likely a ticker
                 # OR if it's 2-4 chars and not a common word, likely a ticker
                 if match.group(1).isupper() or (2 <= len(potential_ticker) <= 4):
                     return potential_ticker
         
         # Fallback: Check for company names with FUZZY MATCHING
-        query_lower = query.lower()
+        if query_lower is None:
+            query_lower = query.lower()
         
         # First try exact substring matching (fast)
         for company_name, ticker in self.company_map.items():
@@ -122,17 +198,18 @@ class FilterExtractor:
                 return ticker
         
         # If no exact match, try fuzzy matching
-        words = query_lower.split()
+        if words is None:
+            words = query_lower.split()
         
         for word in words:
             # Skip very short words and common words
-            if len(word) < 3 or word in ['the', 'and', 'what', 'how', 'was', 'is', 'are']:
+            if len(word) < 3 or word in _STOP_TICKER:
                 continue
             
             # Use our simple fuzzy matcher
             best_match, score = simple_fuzzy_match(
                 word, 
-                list(self.company_map.keys()),
+                self._company_keys,
                 threshold=0.8
             )
             
@@ -149,8 +226,7 @@ class FilterExtractor:
             "revenue in 2024" -> 2024
             "2023 earnings" -> 2023
         """
-        year_pattern = r'\b((19|20)\d{2})\b'
-        year_match = re.search(year_pattern, query)
+        year_match = _YEAR_RE.search(query)
         
         if year_match:
             year = int(year_match.group(1))
@@ -160,7 +236,8 @@ class FilterExtractor:
         
         return None
     
-    def _extract_metrics(self, query: str) -> List[str]:
+    def _extract_metrics(self, query: str, query_lower: Optional[str] = None,
+                         words: Optional[List[str]] = None) -> List[str]:
         """
         Map natural language to exact metric names with AUTOMATIC FUZZY MATCHING
         Handles ANY typo automatically without manual mappings
@@ -170,38 +247,49 @@ class FilterExtractor:
             "prifit in 2024" -> ["income_stmt_Net Income"] (any typo!)
             "revenu and assts" -> ["income_stmt_Revenue", "balance_sheet_Total Assets"]
         """
-        query_lower = query.lower()
+        if query_lower is None:
+            query_lower = query.lower()
+        if words is None:
+            words = query_lower.split()
         found_metrics = []
         
-        # Sort by length to match longer phrases first
-        sorted_metrics = sorted(self.metric_map.items(), 
-                               key=lambda x: len(x[0]), 
-                               reverse=True)
-        
-        # Track which parts of the query we've already matched
-        matched_spans = []
         matched_words = set()  # Track words already matched
         
         # STEP 1: Try exact matching first (fast)
-        for keyword, metric_name in sorted_metrics:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            for match in re.finditer(pattern, query_lower):
-                span = match.span()
-                
-                overlaps = any(
-                    (span[0] < end and span[1] > start)
-                    for start, end in matched_spans
-                )
-                
-                if not overlaps:
-                    if metric_name not in found_metrics:
-                        found_metrics.append(metric_name)
-                        matched_spans.append(span)
-                        # Track the words that were matched
-                        matched_words.update(keyword.split())
+        # Phrases longest first, each skipping spans a longer phrase already
+        # took; then single-word keywords on the tokens outside those spans.
+        # A phrase that is only a longer phrase's substring never matches.
+        hits = []  # (key rank, position, keyword)
+        taken = []  # spans claimed by phrases
+        for keyword, pattern in self._phrases:
+            if keyword not in query_lower:
+                continue
+            for match in pattern.finditer(query_lower):
+                start, end = match.span()
+                if not any(start < e and end > s for s, e in taken):
+                    taken.append((start, end))
+                    hits.append((self._key_rank[keyword], start, keyword))
+        for match in _WORD_RE.finditer(query_lower):
+            word = match.group(0)
+            if word in self._single:
+                start, end = match.span()
+                if not any(start < e and end > s for s, e in taken):
+                    hits.append((self._key_rank[word], start, word))
+        
+        # Same order as the old per-key loop: longest keyword first
+        hits.sort()
+        for _, _, keyword in hits:
+            metric_name = self.metric_map[keyword]
+            if metric_name not in found_metrics:
+                found_metrics.append(metric_name)
+                # Track the words that were matched
+                matched_words.update(keyword.split())
         
         # STEP 2: Fuzzy match on remaining unmatched words
-        words = query_lower.split()
+        # Cheap pre-filter: no word shares a first letter with any metric keyword
+        # (checked on \w+ tokens so leading punctuation doesn't hide the letter)
+        if not any(w[0] in self._metric_initials for w in _WORD_RE.findall(query_lower)):
+            return found_metrics
         
         for word in words:
             # Skip if already matched, too short, common word, or number
@@ -209,7 +297,7 @@ class FilterExtractor:
                 continue
             if len(word) < 4:
                 continue
-            if word in ['the', 'and', 'what', 'how', 'was', 'is', 'are', 'were', 'from', 'with']:
+            if word in _STOP_EXTRACT:
                 continue
             if word.isdigit():
                 continue
@@ -217,7 +305,7 @@ class FilterExtractor:
             # Try fuzzy matching against all metric keywords
             best_match, score = simple_fuzzy_match(
                 word,
-                list(self.metric_map.keys()),
+                self._metric_keys,
                 threshold=0.70  # 70% similarity threshold
             )
             